@@ -0,0 +1,228 @@
+"""
+Benchmark harness for PGN ingest and the analysis functions at growing corpus sizes.
+
+For each size a synthetic corpus is generated (see generate_pgn.py), or reused when one
+with the same seed and sample source exists. Then read_pgn, win_loss_by_opening,
+win_loss_by_elo, win_loss_by_moves and (from task 7) winning_statistics are timed on it. The report lists, per function, the throughput
+curve as (games, seconds, games per second) points.
+
+Usage:
+    python benchmark_analytics.py --sizes 10000 100000 --output curves.json
+    python benchmark_analytics.py --sizes 1000000 --functions read_pgn win_loss_by_opening
+
+Author : Szeto Lok
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+from task6 import *
+from generate_pgn import write_pgn
+
+
+# Task 7 lives in its own folder; its winning_statistics is loaded from there.
+TASK7_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Q7', 'task7.py')
+
+FUNCTIONS = ['read_pgn', 'win_loss_by_opening', 'win_loss_by_elo', 'win_loss_by_moves', 'winning_statistics']
+DEFAULT_SIZES = [10000, 100000]
+
+
+def load_winning_statistics():
+    """
+    Loads winning_statistics from the task 7 folder.
+
+    Returns:
+        function: task7.winning_statistics, or None if task7.py cannot be found.
+    """
+
+    if not os.path.exists(TASK7_FILE):
+        return None
+
+    # task7.py imports its sibling modules (e.g. search_stats) by name, so its folder
+    # must be importable from wherever the benchmark is run.
+    task7_directory = os.path.dirname(os.path.abspath(TASK7_FILE))
+    if task7_directory not in sys.path:
+        sys.path.append(task7_directory)
+
+    specification = importlib.util.spec_from_file_location('task7', TASK7_FILE)
+    task7 = importlib.util.module_from_spec(specification)
+    specification.loader.exec_module(task7)
+
+    return task7.winning_statistics
+
+
+def time_call(function, *arguments) -> tuple[float, object]:
+    """
+    Calls a function once and measures its wall time.
+
+    Args:
+        function (function): The function to call.
+        *arguments: Arguments passed to the function.
+
+    Returns:
+        tuple[float, object]: (seconds taken, return value).
+    """
+
+    start = time.perf_counter()
+    value = function(*arguments)
+    return time.perf_counter() - start, value
+
+
+def benchmark_corpus(file_name: str, functions: list[str]) -> dict:
+    """
+    Times the selected functions on one PGN file.
+
+    Args:
+        file_name (str): Path to the PGN file.
+        functions (list[str]): Names from FUNCTIONS to time.
+
+    Returns:
+        dict: {function name: seconds}, plus 'games' (the number of games in the file).
+    """
+
+    timings = {}
+
+    # Every analysis function needs the parsed games, so read_pgn always runs.
+    seconds, games = time_call(read_pgn, file_name)
+    timings['games'] = len(games)
+    if 'read_pgn' in functions:
+        timings['read_pgn'] = seconds
+
+    if 'win_loss_by_opening' in functions:
+        timings['win_loss_by_opening'] = time_call(win_loss_by_opening, games)[0]
+
+    if 'win_loss_by_elo' in functions:
+        timings['win_loss_by_elo'] = time_call(win_loss_by_elo, games, 0, 200)[0]
+
+    if 'win_loss_by_moves' in functions:
+        timings['win_loss_by_moves'] = time_call(win_loss_by_moves, games, ['e4', 'e5', 'Nf3'])[0]
+
+    # winning_statistics reads the file itself, so its time includes parsing.
+    if 'winning_statistics' in functions:
+        winning_statistics = load_winning_statistics()
+        if winning_statistics is not None:
+            timings['winning_statistics'] = time_call(winning_statistics, file_name, 3, 5)[0]
+
+    return timings
+
+
+def corpus_file_name(size: int, seed: int, sample_from: str = None) -> str:
+    """
+    Names a generated corpus after everything that determines its contents.
+
+    Args:
+        size (int): Corpus size in games.
+        seed (int): Random seed for the generator.
+        sample_from (str): Optional PGN file the opening lines are sampled from.
+
+    Returns:
+        str: e.g. 'synthetic_1000_0.pgn', or 'synthetic_1000_0_lichess_small_1a2b3c4d.pgn'
+            when sampling (the file's stem and a checksum of its absolute path).
+    """
+
+    if sample_from is None:
+        return f'synthetic_{size}_{seed}.pgn'
+
+    stem = os.path.splitext(os.path.basename(sample_from))[0]
+    source = zlib.crc32(os.path.abspath(sample_from).encode('utf-8'))
+
+    return f'synthetic_{size}_{seed}_{stem}_{source:08x}.pgn'
+
+
+def run_benchmark(sizes: list[int], functions: list[str], directory: str, seed: int = 0,
+                  sample_from: str = None) -> dict:
+    """
+    Generates (or reuses) a corpus for each size and times the selected functions.
+
+    Args:
+        sizes (list[int]): Corpus sizes in games.
+        functions (list[str]): Names from FUNCTIONS to time.
+        directory (str): Folder holding the generated corpora; a corpus generated with
+            the same size, seed and sample source is reused.
+        seed (int): Random seed for the generator.
+        sample_from (str): Optional PGN file to sample opening lines from.
+
+    Returns:
+        dict: {'sizes', 'curves'}, where curves maps each function name to a list of
+            {'games', 'seconds', 'games_per_second'} points, one per size.
+    """
+
+    curves = {name: [] for name in functions}
+
+    for size in sizes:
+        file_name = os.path.join(directory, corpus_file_name(size, seed, sample_from))
+
+        if not os.path.exists(file_name):
+            write_pgn(file_name, size, seed=seed, sample_from=sample_from)
+
+        timings = benchmark_corpus(file_name, functions)
+
+        for name in functions:
+            if name in timings:
+                seconds = timings[name]
+                curves[name].append({
+                    'games': timings['games'],
+                    'seconds': round(seconds, 6),
+                    'games_per_second': round(timings['games'] / seconds, 1) if seconds > 0 else None,
+                })
+
+    return {'sizes': sizes, 'curves': curves}
+
+
+def format_report(report: dict) -> str:
+    """
+    Formats a benchmark report as a plain text table of games per second.
+
+    Args:
+        report (dict): A report from run_benchmark.
+
+    Returns:
+        str: One row per function and one column per corpus size.
+    """
+
+    lines = ['function'.ljust(22) + ''.join(f'{size:>14}' for size in report['sizes'])]
+
+    for name, points in report['curves'].items():
+        cells = ''.join(f"{point['games_per_second'] or 0:>14.0f}" for point in points)
+        lines.append(name.ljust(22) + cells)
+
+    return '\n'.join(lines)
+
+
+def main(arguments: list[str]) -> int:
+    """
+    Command line entry point.
+
+    Args:
+        arguments (list[str]): Command line arguments (without the program name).
+
+    Returns:
+        int: Exit status.
+    """
+
+    parser = argparse.ArgumentParser(description='Benchmark PGN ingest and analytics at several corpus sizes.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--functions', nargs='+', choices=FUNCTIONS, default=FUNCTIONS)
+    parser.add_argument('--directory', default=tempfile.gettempdir(), help='folder for the generated corpora')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sample-from', help='sample opening lines from this PGN file')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    options = parser.parse_args(arguments)
+
+    report = run_benchmark(options.sizes, options.functions, options.directory, options.seed, options.sample_from)
+    print(format_report(report))
+
+    if options.output:
+        with open(options.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,119 @@
+"""
+Provides ECO (Encyclopaedia of Chess Openings) codes as compact integers and
+win/loss statistics grouped at the three levels of the ECO hierarchy:
+    family  'C'    (5 families A-E)
+    group   'C0x'  (10 groups per family)
+    code    'C00'  (10 codes per group)
+
+A code such as 'C42' is stored as letter * 100 + number (here 242), so the 500
+codes fit in an int16 and the group and family of a code are code // 10 and
+code // 100. Statistics are counted once per code; the group and family levels are
+sums over a reshaped array instead of separate passes over the games.
+
+Read the games with read_pgn(file_name, extra_tags=('eco',)), or
+read_game_table(file_name, extra_tags=('eco',)).
+
+Author : Szeto Lok
+"""
+
+import numpy as np
+from game_table import *
+
+
+ECO_FAMILIES = 'ABCDE'
+
+# Number of distinct ECO codes (A00 to E99).
+NUMBER_OF_ECO_CODES = 500
+
+# Compact code used when the ECO tag is missing or malformed.
+MISSING_ECO = -1
+
+
+def eco_code(eco: str) -> int:
+    """
+    Converts an ECO string into its compact code.
+
+    Args:
+        eco (str): An ECO code such as 'C42'.
+
+    Returns:
+        int: letter * 100 + number (e.g. 'C42' -> 242), or MISSING_ECO.
+    """
+
+    if len(eco) != 3 or eco[0] not in ECO_FAMILIES or not eco[1:].isdigit():
+        return MISSING_ECO
+
+    return ECO_FAMILIES.index(eco[0]) * 100 + int(eco[1:])
+
+
+def eco_name(code: int) -> str:
+    """
+    Converts a compact code back into its ECO string (e.g. 242 -> 'C42').
+    """
+
+    return f'{ECO_FAMILIES[code // 100]}{code % 100:02d}'
+
+
+def eco_column(games) -> np.ndarray:
+    """
+    Returns the compact ECO code of every game.
+
+    Args:
+        games (list[dict] | GameTable): Games read with the 'eco' extra tag.
+
+    Returns:
+        np.ndarray: int16 compact codes, MISSING_ECO where the tag is missing.
+    """
+
+    # Encoded table: convert each distinct ECO string once, then gather by code.
+    if isinstance(games, GameTable):
+        table = games.tables['eco']
+        values = np.array([eco_code(value) for value in table.strings], dtype=np.int16)
+        return values[games.columns['eco']]
+
+    return np.fromiter((eco_code(game['eco']) for game in games), dtype=np.int16, count=len(games))
+
+
+def win_loss_by_eco(games) -> dict:
+    """
+    Counts white/black wins per ECO family, group and code in one pass.
+
+    Args:
+        games (list[dict] | GameTable): Games read with the 'eco' extra tag.
+
+    Returns:
+        dict: {'family': {'C': (white_wins, black_wins)},
+               'group': {'C4x': (white_wins, black_wins)},
+               'code': {'C42': (white_wins, black_wins)}}
+            Each level only lists entries with at least one game.
+    """
+
+    codes = eco_column(games)
+
+    if isinstance(games, GameTable):
+        results = games.columns['result']
+    else:
+        results = np.fromiter((RESULTS.index(game['result']) if game['result'] in RESULTS else len(RESULTS)
+                               for game in games), dtype=np.int32, count=len(games))
+
+    # One bincount over (code, outcome) pairs, where outcome 3 collects every other result.
+    known = codes != MISSING_ECO
+    outcomes = np.minimum(results[known], len(RESULTS))
+    keys = codes[known].astype(np.int64) * (len(RESULTS) + 1) + outcomes
+    counts = np.bincount(keys, minlength=NUMBER_OF_ECO_CODES * (len(RESULTS) + 1))
+    counts = counts.reshape(NUMBER_OF_ECO_CODES, len(RESULTS) + 1)
+
+    # The group and family levels are sums over consecutive codes.
+    levels = {
+        'family': (counts.reshape(len(ECO_FAMILIES), 100, -1).sum(axis=1), lambda index: ECO_FAMILIES[index]),
+        'group': (counts.reshape(len(ECO_FAMILIES) * 10, 10, -1).sum(axis=1), lambda index: eco_name(index * 10)[:2] + 'x'),
+        'code': (counts, eco_name),
+    }
+
+    return {
+        level: {
+            name(index): (int(level_counts[index, WHITE_WIN]), int(level_counts[index, BLACK_WIN]))
+            for index in np.flatnonzero(level_counts.sum(axis=1) > 0)
+        }
+        for level, (level_counts, name) in levels.items()
+    }
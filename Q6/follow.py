@@ -0,0 +1,287 @@
+"""
+Provides a follow (tail) mode for a PGN file that keeps growing during the day.
+PgnFollower remembers the byte offset after the last game it parsed; each poll()
+reads only what was appended since, and LiveStatistics updates the opening, Elo
+and move-prefix counts game by game instead of re-reading the whole file.
+
+The writer may be in the middle of appending a game when the file is polled. The
+last record of the file is therefore only parsed when it is complete (it ends with
+a newline and with its result, outside a comment); otherwise it is left for the
+next poll, which starts reading again at that record's offset. A final game without
+a trailing newline (e.g. own_example.pgn, which ends in "0-1") is therefore not
+counted until something is written after it.
+
+If the file shrinks below the saved offset (truncated or replaced), the follower
+starts again from the beginning and resets its statistics in place.
+
+Usage:
+    python follow.py live_games.pgn --interval 5
+
+Author : Szeto Lok
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from ingest import *
+
+
+# Prefixes up to this many plies are counted as games arrive; longer ones scan the games.
+DEFAULT_PREFIX_DEPTH = 8
+
+# Seconds between polls of the followed file.
+DEFAULT_INTERVAL = 5.0
+
+# Reasons check_record gives for a game that may still be being written.
+INCOMPLETE_REASONS = ('missing moves', 'unclosed comment', 'truncated moves')
+
+
+class LiveStatistics:
+    """
+    Opening, Elo difference and move-prefix win counts that are updated one game at a time.
+
+    Instance Variables:
+        games (list[dict]): Every game added so far, in file order.
+        openings (dict[str, list[int]]): Opening -> [white_wins, black_wins].
+        lower_elo_wins (np.ndarray): Wins of the lower rated player per absolute Elo difference.
+        higher_elo_wins (np.ndarray): Wins of the higher rated player per absolute Elo difference.
+        prefix_depth (int): Longest prefix (in plies) kept in prefixes.
+        prefixes (dict[tuple, list[int]]): Move prefix -> [white_wins, black_wins].
+    """
+
+    def __init__(self, prefix_depth: int = DEFAULT_PREFIX_DEPTH) -> None:
+        """
+        Initialize empty statistics.
+
+        Arguments:
+            prefix_depth (int): Longest move prefix counted incrementally.
+        """
+
+        self.prefix_depth = prefix_depth
+        self.reset()
+
+
+    def reset(self) -> None:
+        """
+        Forgets every game, keeping prefix_depth.
+        """
+
+        self.games = []
+        self.openings = {}
+        self.lower_elo_wins = np.zeros(0, dtype=np.int64)
+        self.higher_elo_wins = np.zeros(0, dtype=np.int64)
+        self.prefixes = {}
+
+
+    def add_game(self, game: dict) -> None:
+        """
+        Counts one more game in every aggregate.
+
+        Arguments:
+            game (dict): A game as returned by read_pgn.
+        """
+
+        self.games.append(game)
+
+        # 0 = white won, 1 = black won, None = draw or unfinished.
+        winner = {'1-0': 0, '0-1': 1}.get(game['result'])
+
+        # Openings are reported even when they only have draws (as win_loss_by_opening does).
+        counts = self.openings.setdefault(game['opening'], [0, 0])
+        if winner is not None:
+            counts[winner] += 1
+
+        if winner is None:
+            return
+
+        # Elo difference, counted only when both ratings are numbers (as win_loss_by_elo does).
+        if game['whiteelo'].isdigit() and game['blackelo'].isdigit():
+            white_elo = int(game['whiteelo'])
+            black_elo = int(game['blackelo'])
+            difference = abs(white_elo - black_elo)
+
+            # Grow both arrays (doubling) with zeros until the difference fits.
+            if difference >= len(self.lower_elo_wins):
+                padding = np.zeros(max(difference + 1, 2 * len(self.lower_elo_wins)) - len(self.lower_elo_wins),
+                                   dtype=np.int64)
+                self.lower_elo_wins = np.concatenate((self.lower_elo_wins, padding))
+                self.higher_elo_wins = np.concatenate((self.higher_elo_wins, padding))
+
+            lower_is_white = white_elo < black_elo
+            if (winner == 0) == lower_is_white:
+                self.lower_elo_wins[difference] += 1
+            else:
+                self.higher_elo_wins[difference] += 1
+
+        # Every prefix of the first prefix_depth moves, stopping at the end of the game.
+        prefix = []
+        for key in MOVE_KEYS[:self.prefix_depth]:
+            if game[key] == '-':
+                break
+            prefix.append(game[key])
+            self.prefixes.setdefault(tuple(prefix), [0, 0])[winner] += 1
+
+
+    def win_loss_by_opening(self) -> dict:
+        """
+        Returns {opening_name: (white_wins, black_wins)}, like win_loss_by_opening.
+        """
+
+        return {opening: tuple(counts) for opening, counts in self.openings.items()}
+
+
+    def win_loss_by_elo(self, lower: int, upper: int) -> tuple[int, int]:
+        """
+        Returns (lower_elo_wins, higher_elo_wins) for differences in (lower, upper), like win_loss_by_elo.
+        """
+
+        first = max(lower + 1, 0)
+        last = min(upper, len(self.lower_elo_wins))
+        if first >= last:
+            return 0, 0
+
+        return int(self.lower_elo_wins[first:last].sum()), int(self.higher_elo_wins[first:last].sum())
+
+
+    def win_loss_by_moves(self, moves: list[str]) -> tuple[int, int]:
+        """
+        Returns (white_wins, black_wins) of games starting with moves, like win_loss_by_moves.
+        """
+
+        if len(moves) > self.prefix_depth or not moves:
+            # Longer prefixes are not kept, so count them from the games.
+            if not self.games:
+                return 0, 0
+            return win_loss_by_moves(self.games, moves)
+
+        return tuple(self.prefixes.get(tuple(moves), (0, 0)))
+
+
+class PgnFollower:
+    """
+    Reads the games appended to a PGN file since the previous poll.
+
+    Instance Variables:
+        file_name (str): Path to the followed PGN file.
+        offset (int): Byte offset after the last record that was parsed (or quarantined).
+        stats (IngestStats): Ingest counters since the follower started (or the file was truncated).
+        statistics (LiveStatistics): The aggregates of every game parsed so far.
+        extra_tags (tuple[str, ...]): Additional tags to keep (see read_pgn).
+    """
+
+    def __init__(self, file_name: str, offset: int = 0, statistics: LiveStatistics = None,
+                 extra_tags: tuple[str, ...] = ()) -> None:
+        """
+        Initialize the follower; nothing is read until poll().
+
+        Arguments:
+            file_name (str): Path to the followed PGN file.
+            offset (int): Byte offset to resume from, e.g. a saved follower.offset.
+            statistics (LiveStatistics): Aggregates to update (new ones by default).
+            extra_tags (tuple[str, ...]): Additional tags to keep.
+        """
+
+        self.file_name = file_name
+        self.offset = offset
+        self.stats = IngestStats()
+        self.statistics = statistics if statistics is not None else LiveStatistics()
+        self.extra_tags = extra_tags
+
+
+    def poll(self, quarantine=None) -> list[dict]:
+        """
+        Parses the complete games appended since the last poll and adds them to the statistics.
+
+        Arguments:
+            quarantine: Optional binary file for malformed records (see iter_games).
+
+        Returns:
+            list[dict]: The new games, in file order.
+        """
+
+        # A file shorter than the offset was truncated or replaced: start again. The
+        # objects are reset in place, so references held by the caller stay live.
+        if os.path.getsize(self.file_name) < self.offset:
+            self.offset = 0
+            self.statistics.reset()
+            self.stats.reset()
+
+        with open(self.file_name, 'rb') as file:
+            file.seek(self.offset)
+            records = list(iter_records(file, self.offset))
+
+        # The last record may still be being written: leave it for the next poll.
+        if records and not _is_complete(records[-1][1]):
+            records.pop()
+
+        games = list(ingest_records(records, quarantine, self.stats, self.extra_tags))
+        for game in games:
+            self.statistics.add_game(game)
+
+        if records:
+            offset, record = records[-1]
+            self.offset = offset + len(record)
+
+        return games
+
+
+    def follow(self, interval: float = DEFAULT_INTERVAL, polls: int = None):
+        """
+        Polls the file repeatedly.
+
+        Arguments:
+            interval (float): Seconds to wait between polls.
+            polls (int): Number of polls, or None to follow forever.
+
+        Yields:
+            list[dict]: The new games of each poll (possibly empty).
+        """
+
+        count = 0
+        while polls is None or count < polls:
+            if count:
+                time.sleep(interval)
+            yield self.poll()
+            count += 1
+
+
+def _is_complete(record: bytes) -> bool:
+    """
+    Returns True if the last record of a file cannot still be growing.
+    """
+
+    # A line still being written has no newline yet.
+    if not record.endswith(b'\n'):
+        return False
+
+    reason = check_record(record)[0]
+
+    return reason not in INCOMPLETE_REASONS
+
+
+def main(argv: list[str]) -> int:
+    """
+    Follows a PGN file and prints the ingest statistics and top openings after every poll.
+    """
+
+    parser = argparse.ArgumentParser(description='Follow a growing PGN file and print live statistics.')
+    parser.add_argument('file_name', help='PGN file to follow')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='seconds between polls')
+    parser.add_argument('--polls', type=int, help='stop after this many polls')
+    arguments = parser.parse_args(argv)
+
+    follower = PgnFollower(arguments.file_name)
+
+    for games in follower.follow(arguments.interval, arguments.polls):
+        openings = follower.statistics.win_loss_by_opening()
+        top = sorted(openings.items(), key=lambda item: -sum(item[1]))[:5]
+        print(json.dumps({'offset': follower.offset, 'new_games': len(games), **follower.stats.as_dict(),
+                          'top_openings': top}))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,211 @@
+"""
+Provides a dictionary-encoded, column-oriented table of parsed chess games. Every
+header field and every move is stored as a small integer code, with one lookup
+table per field to turn codes back into strings. Long repeated values such as
+opening names are therefore stored once, and analysis can group on integers.
+
+Author : Szeto Lok
+"""
+
+import numpy as np
+from game_record import *
+
+
+# Result codes are fixed so analysis code can compare against constants.
+WHITE_WIN = 0
+BLACK_WIN = 1
+DRAW = 2
+RESULTS = ('1-0', '0-1', '1/2-1/2')
+
+# Move code 0 always means "no move in this slot".
+NO_MOVE = 0
+
+# Elo value used when a rating is missing or not a number.
+MISSING_ELO = -1
+
+
+class StringTable:
+    """
+    A two-way mapping between strings and consecutive integer codes.
+
+    Instance Variables:
+        strings (list[str]): The string for each code (code -> string lookup).
+        codes (dict[str, int]): The code for each string (string -> code lookup).
+    """
+
+    def __init__(self, strings: tuple[str, ...] = ()) -> None:
+        """
+        Initialize the table, optionally pre-registering strings at codes 0, 1, 2, ...
+
+        Arguments:
+            strings (tuple[str, ...]): Strings that must receive the first codes.
+        """
+
+        self.strings = []
+        self.codes = {}
+
+        for value in strings:
+            self.encode(value)
+
+
+    def encode(self, value: str) -> int:
+        """
+        Returns the code of a string, registering it if it has not been seen before.
+
+        Arguments:
+            value (str): The string to encode.
+
+        Returns:
+            int: The code of the string.
+        """
+
+        code = self.codes.get(value)
+
+        # New string: give it the next free code.
+        if code is None:
+            code = len(self.strings)
+            self.codes[value] = code
+            self.strings.append(value)
+
+        return code
+
+
+    def decode(self, code: int) -> str:
+        """
+        Returns the string stored under a code.
+
+        Arguments:
+            code (int): A code previously returned by encode.
+
+        Returns:
+            str: The original string.
+        """
+
+        return self.strings[code]
+
+
+    def __len__(self) -> int:
+        """
+        Returns the number of distinct strings in the table.
+        """
+
+        return len(self.strings)
+
+
+class GameTable:
+    """
+    Column-oriented storage for a list of games, with every string dictionary-encoded.
+
+    Instance Variables:
+        tables (dict[str, StringTable]): The code <-> string table of each encoded tag.
+        columns (dict[str, np.ndarray]): The int32 code column of each encoded tag.
+        move_table (StringTable): The code <-> SAN table shared by all move slots ('-' is code 0).
+        moves (np.ndarray): int32 array of shape (games, 40) holding the move code of each ply.
+        white_elo (np.ndarray): int32 white ratings (MISSING_ELO when not a number).
+        black_elo (np.ndarray): int32 black ratings (MISSING_ELO when not a number).
+    """
+
+    def __init__(self, tables: dict, columns: dict, move_table: StringTable,
+                 moves: np.ndarray, white_elo: np.ndarray, black_elo: np.ndarray) -> None:
+        """
+        Initialize the table from already encoded columns.
+
+        Arguments:
+            tables (dict[str, StringTable]): Lookup table for each tag.
+            columns (dict[str, np.ndarray]): Code column for each tag.
+            move_table (StringTable): Lookup table for the move codes.
+            moves (np.ndarray): Move codes, one row per game and one column per ply.
+            white_elo (np.ndarray): Numeric white ratings.
+            black_elo (np.ndarray): Numeric black ratings.
+        """
+
+        self.tables = tables
+        self.columns = columns
+        self.move_table = move_table
+        self.moves = moves
+        self.white_elo = white_elo
+        self.black_elo = black_elo
+
+
+    @classmethod
+    def from_games(cls, games: list[dict], tags: tuple[str, ...] = GAME_TAGS) -> 'GameTable':
+        """
+        Encodes a list of games (dictionaries or Game records) into a table.
+
+        Arguments:
+            games (list[dict]): Games as returned by read_pgn.
+            tags (tuple[str, ...]): The tags to encode; GAME_TAGS plus any extra
+                tags the games were read with (e.g. 'eco').
+
+        Returns:
+            GameTable: The encoded table, with rows in the same order as games.
+        """
+
+        number_of_games = len(games)
+
+        # One lookup table per tag; results get their fixed codes first.
+        tables = {tag: StringTable() for tag in tags}
+        tables['result'] = StringTable(RESULTS)
+
+        # Encode every tag of every game into its code column.
+        columns = {}
+        for tag in tags:
+            encode = tables[tag].encode
+            columns[tag] = np.fromiter((encode(game[tag]) for game in games), dtype=np.int32, count=number_of_games)
+
+        # Encode the 40 move slots of every game with one shared move table.
+        move_table = StringTable(('-',))
+        moves = np.zeros((number_of_games, len(MOVE_KEYS)), dtype=np.int32)
+        for row, game in enumerate(games):
+            moves[row] = [move_table.encode(game[key]) for key in MOVE_KEYS]
+
+        # Ratings are decoded once from their (few) distinct strings.
+        white_elo = _elo_column(tables['whiteelo'], columns['whiteelo'])
+        black_elo = _elo_column(tables['blackelo'], columns['blackelo'])
+
+        return cls(tables, columns, move_table, moves, white_elo, black_elo)
+
+
+    def decode(self, tag: str, code: int) -> str:
+        """
+        Returns the string behind a code of one tag column.
+
+        Arguments:
+            tag (str): The tag name, e.g. 'opening'.
+            code (int): A code from columns[tag].
+
+        Returns:
+            str: The original tag value.
+        """
+
+        return self.tables[tag].decode(code)
+
+
+    def __len__(self) -> int:
+        """
+        Returns the number of games in the table.
+        """
+
+        return len(self.moves)
+
+
+def _elo_column(table: StringTable, codes: np.ndarray) -> np.ndarray:
+    """
+    Converts an encoded rating column into int32 ratings.
+
+    Args:
+        table (StringTable): The lookup table of the rating tag.
+        codes (np.ndarray): The code column of the rating tag.
+
+    Returns:
+        np.ndarray: Ratings per game, MISSING_ELO where the value is not a number.
+    """
+
+    # Convert each distinct rating string once, then gather by code.
+    values = np.full(len(table), MISSING_ELO, dtype=np.int32)
+
+    for code, value in enumerate(table.strings):
+        if value.isdigit():
+            values[code] = int(value)
+
+    return values[codes]
@@ -0,0 +1,242 @@
+"""
+Generates synthetic Lichess-style PGN files of any size for benchmarking.
+
+Every game follows one line from a pool of opening lines. The pool is either built
+from legal random moves (using binh_chess.possible_moves) as a branching tree, so
+popular prefixes are shared by many games, or sampled from the games of an existing
+PGN file. Headers (players, ratings, results, dates, time controls) are random but
+realistic, and results lean towards the higher rated player.
+
+Usage:
+    python generate_pgn.py synthetic_100k.pgn --games 100000
+    python generate_pgn.py sampled_1m.pgn --games 1000000 --sample-from lichess_small.pgn
+
+Author : Szeto Lok
+"""
+
+import argparse
+import datetime
+import random
+import sys
+from binh_chess import possible_moves
+
+
+EVENTS = ['Rated Bullet game', 'Rated Blitz game', 'Rated Classical game']
+TIME_CONTROLS = ['60+0', '0+1', '180+0', '300+0', '300+3', '480+0', '600+8', '900+15']
+TERMINATIONS = ['Normal', 'Normal', 'Time forfeit']
+
+# Games are written to the file in batches of this many games.
+WRITE_BATCH_SIZE = 10000
+
+
+def build_random_pool(pool_size: int, max_plies: int, rng: random.Random) -> list[tuple[list[str], str, str]]:
+    """
+    Builds a tree-shaped pool of legal random opening lines.
+
+    Each new line copies a random prefix of an existing line and continues it with
+    random legal moves, so early plies are shared by many lines as in real databases.
+
+    Args:
+        pool_size (int): Number of lines to build.
+        max_plies (int): Maximum length of a line in plies.
+        rng (random.Random): Random number generator.
+
+    Returns:
+        list[tuple[list[str], str, str]]: (moves, opening name, ECO code) for each line.
+    """
+
+    pool = []
+
+    for _ in range(pool_size):
+
+        # Branch off a random existing line (the first line starts from scratch).
+        if pool:
+            parent_moves = rng.choice(pool)[0]
+            moves = parent_moves[:rng.randint(0, min(len(parent_moves), 12))]
+        else:
+            moves = []
+
+        # Continue with random legal moves until the target length or the game ends.
+        target_plies = rng.randint(max_plies // 2, max_plies)
+        while len(moves) < target_plies:
+            legal_moves = possible_moves(moves)
+            if not legal_moves:
+                break
+            moves.append(rng.choice(legal_moves))
+
+        # Name the opening after its first three plies, like a coarse opening book.
+        opening = 'Synthetic Opening: ' + ' '.join(moves[:3])
+        eco = f"{'ABCDE'[len(pool) % 5]}{rng.randint(0, 99):02d}"
+
+        pool.append((moves, opening, eco))
+
+    return pool
+
+
+def build_sampled_pool(file_name: str) -> list[tuple[list[str], str, str]]:
+    """
+    Builds a pool of opening lines from the games of an existing PGN file.
+
+    Args:
+        file_name (str): Path to the PGN file to sample from.
+
+    Returns:
+        list[tuple[list[str], str, str]]: (moves, opening name, ECO code) for each game.
+    """
+
+    # Imported here so the random generator does not need pandas.
+    from task6 import read_pgn
+    from game_record import MOVE_KEYS
+
+    pool = []
+    for game in read_pgn(file_name):
+        moves = [game[key] for key in MOVE_KEYS if game[key] != '-']
+        pool.append((moves, game['opening'], '?'))
+
+    return pool
+
+
+def format_movetext(moves: list[str], result: str) -> str:
+    """
+    Formats moves as numbered PGN movetext ending with the result.
+
+    Args:
+        moves (list[str]): Moves in SAN, starting with white.
+        result (str): The game result, e.g. '1-0'.
+
+    Returns:
+        str: Movetext such as '1. e4 e5 2. Nf3 1-0'.
+    """
+
+    parts = []
+    for ply, move in enumerate(moves):
+        if ply % 2 == 0:
+            parts.append(f'{ply // 2 + 1}.')
+        parts.append(move)
+
+    parts.append(result)
+    return ' '.join(parts)
+
+
+def generate_games(number_of_games: int, pool: list[tuple[list[str], str, str]], rng: random.Random,
+                   number_of_players: int = 5000):
+    """
+    Generates the PGN text of synthetic games, one game at a time.
+
+    Args:
+        number_of_games (int): Number of games to generate.
+        pool (list[tuple[list[str], str, str]]): Opening lines to draw moves from.
+        rng (random.Random): Random number generator.
+        number_of_players (int): Size of the synthetic player population.
+
+    Yields:
+        str: The full PGN text of one game, followed by a blank line.
+    """
+
+    # Popular lines are played far more often than rare ones (Zipf-like weights).
+    weights = [1 / (rank + 1) for rank in range(len(pool))]
+
+    # Each player keeps one rating for the whole file.
+    ratings = [int(rng.gauss(1500, 300)) for _ in range(number_of_players)]
+
+    timestamp = datetime.datetime(2013, 1, 1)
+
+    for _ in range(number_of_games):
+        moves, opening, eco = rng.choices(pool, weights)[0]
+
+        white, black = rng.sample(range(number_of_players), 2)
+        white_elo = max(ratings[white], 600)
+        black_elo = max(ratings[black], 600)
+
+        # Expected score of white from the Elo formula decides the result.
+        white_expected = 1 / (1 + 10 ** ((black_elo - white_elo) / 400))
+        draw_chance = 0.05
+        roll = rng.random()
+        if roll < draw_chance:
+            result = '1/2-1/2'
+        elif roll < draw_chance + (1 - draw_chance) * white_expected:
+            result = '1-0'
+        else:
+            result = '0-1'
+
+        timestamp += datetime.timedelta(seconds=rng.randint(1, 20))
+
+        yield (
+            f'[Event "{rng.choice(EVENTS)}"]\n'
+            f'[Site "https://lichess.org/synthetic"]\n'
+            f'[White "player_{white:05d}"]\n'
+            f'[Black "player_{black:05d}"]\n'
+            f'[Result "{result}"]\n'
+            f'[UTCDate "{timestamp:%Y.%m.%d}"]\n'
+            f'[UTCTime "{timestamp:%H:%M:%S}"]\n'
+            f'[WhiteElo "{white_elo}"]\n'
+            f'[BlackElo "{black_elo}"]\n'
+            f'[ECO "{eco}"]\n'
+            f'[Opening "{opening}"]\n'
+            f'[TimeControl "{rng.choice(TIME_CONTROLS)}"]\n'
+            f'[Termination "{rng.choice(TERMINATIONS)}"]\n'
+            f'\n'
+            f'{format_movetext(moves, result)}\n'
+            f'\n'
+        )
+
+
+def write_pgn(file_name: str, number_of_games: int, seed: int = 0, pool_size: int = 200,
+              max_plies: int = 80, sample_from: str = None) -> None:
+    """
+    Writes a synthetic PGN file.
+
+    Args:
+        file_name (str): Path of the PGN file to create.
+        number_of_games (int): Number of games to write.
+        seed (int): Random seed; the same arguments always produce the same file.
+        pool_size (int): Number of random opening lines (ignored with sample_from).
+        max_plies (int): Maximum length of a random line in plies.
+        sample_from (str): Optional PGN file whose games are used as the opening lines.
+    """
+
+    rng = random.Random(seed)
+
+    if sample_from:
+        pool = build_sampled_pool(sample_from)
+    else:
+        pool = build_random_pool(pool_size, max_plies, rng)
+
+    with open(file_name, 'w', encoding='utf-8') as file:
+        batch = []
+        for game_text in generate_games(number_of_games, pool, rng):
+            batch.append(game_text)
+
+            if len(batch) == WRITE_BATCH_SIZE:
+                file.write(''.join(batch))
+                batch = []
+
+        file.write(''.join(batch))
+
+
+def main(arguments: list[str]) -> int:
+    """
+    Command line entry point.
+
+    Args:
+        arguments (list[str]): Command line arguments (without the program name).
+
+    Returns:
+        int: Exit status.
+    """
+
+    parser = argparse.ArgumentParser(description='Generate a synthetic Lichess-style PGN file.')
+    parser.add_argument('output', help='PGN file to write')
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pool-size', type=int, default=200)
+    parser.add_argument('--max-plies', type=int, default=80)
+    parser.add_argument('--sample-from', help='use the games of this PGN file as opening lines')
+    options = parser.parse_args(arguments)
+
+    write_pgn(options.output, options.games, options.seed, options.pool_size, options.max_plies, options.sample_from)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,431 @@
+"""
+Provides a lenient, streaming PGN reader for very large files. Games are read one at
+a time in binary, checked, and either parsed (with the same build_game as read_pgn)
+or written to a quarantine file together with their byte offset and the reason they
+were rejected. One bad record never stops the ingest or shifts moves into the next
+game; IngestStats counts what happened.
+
+A record is rejected when it is not valid UTF-8, has a tag line that does not match
+[Name "value"], has no tags or no move text, has an unclosed comment, does not end
+with a result, or ends with a result different from its [Result] tag.
+
+With pipelined=True a reader thread reads large blocks and splits them into
+records while the calling thread parses, so waiting on the disk overlaps with parsing.
+
+Usage:
+    python ingest.py lichess_2013_01.pgn --quarantine bad_games.pgn --pipelined
+
+Author : Szeto Lok
+"""
+
+import argparse
+import json
+import queue
+import re
+import sys
+import threading
+from task6 import *
+
+
+# A well-formed tag line: [Name "value"]
+TAG_LINE = re.compile(r'\[([A-Za-z0-9_]+)\s+"(.*)"\]$')
+
+# The move text of a complete game ends with its result.
+RESULT_AT_END = re.compile(r'(1-0|0-1|1/2-1/2|\*)$')
+
+# Bytes read per readinto call in pipelined mode, and batches the reader may run ahead.
+DEFAULT_BLOCK_SIZE = 1 << 20
+DEFAULT_QUEUE_SIZE = 8
+
+
+class IngestStats:
+    """
+    Counters collected while ingesting a file.
+
+    Instance Variables:
+        games (int): Games parsed successfully.
+        malformed (int): Records written to quarantine.
+        bytes_read (int): Bytes consumed from the input.
+        reasons (dict[str, int]): Number of quarantined records per reason.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize all counters to zero.
+        """
+
+        self.reset()
+
+
+    def reset(self) -> None:
+        """
+        Sets all counters back to zero.
+        """
+
+        self.games = 0
+        self.malformed = 0
+        self.bytes_read = 0
+        self.reasons = {}
+
+
+    def reject(self, reason: str) -> None:
+        """
+        Records one quarantined record.
+
+        Arguments:
+            reason (str): Why the record was rejected.
+        """
+
+        self.malformed += 1
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+
+    def as_dict(self) -> dict:
+        """
+        Returns the statistics as a plain (JSON serialisable) dictionary.
+        """
+
+        return {
+            'games': self.games,
+            'malformed': self.malformed,
+            'bytes_read': self.bytes_read,
+            'reasons': dict(self.reasons),
+        }
+
+
+    def __repr__(self) -> str:
+        """
+        Returns a one-line summary of the statistics.
+        """
+
+        return f'IngestStats({self.as_dict()})'
+
+
+def iter_records(file, offset: int = 0):
+    """
+    Splits a binary PGN stream into raw game records.
+
+    A new record starts at a tag line that follows move text (outside a comment), so a
+    game whose blank separator line is missing still ends where the next one begins.
+
+    Args:
+        file: A file opened in binary mode.
+        offset (int): Byte offset of the file's current position.
+
+    Yields:
+        tuple[int, bytes]: The byte offset of each record and its raw bytes.
+    """
+
+    record = []
+    record_offset = offset
+    in_moves = False
+    comment_depth = 0
+
+    for line in file:
+        starts_game = line.startswith(b'[') and in_moves and comment_depth == 0
+
+        if starts_game:
+            yield record_offset, b''.join(record)
+            record = []
+            record_offset = offset
+            in_moves = False
+
+        # The first record starts at its first non-blank line.
+        if not record and not line.strip():
+            offset += len(line)
+            record_offset = offset
+            continue
+
+        record.append(line)
+        offset += len(line)
+
+        # Move text (or any text that is not a tag line) switches the record to its moves.
+        if line.strip() and (not line.startswith(b'[') or comment_depth > 0):
+            in_moves = True
+            comment_depth = max(comment_depth + line.count(b'{') - line.count(b'}'), 0)
+
+    if record:
+        yield record_offset, b''.join(record)
+
+
+def read_lines(file, block_size: int = DEFAULT_BLOCK_SIZE):
+    """
+    Reads a binary file in large blocks into one reusable buffer and yields its lines.
+
+    Args:
+        file: A file opened in binary mode.
+        block_size (int): Bytes read per readinto call.
+
+    Yields:
+        bytes: Each line, with its line ending.
+    """
+
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    carry = b''
+
+    while True:
+        size = file.readinto(buffer)
+        if not size:
+            break
+
+        lines = (carry + view[:size]).split(b'\n')
+
+        # The last piece is an unfinished line: keep it for the next block.
+        carry = lines.pop()
+        for line in lines:
+            yield line + b'\n'
+
+    if carry:
+        yield carry
+
+
+def iter_records_pipelined(file_name: str, block_size: int = DEFAULT_BLOCK_SIZE,
+                           queue_size: int = DEFAULT_QUEUE_SIZE):
+    """
+    Splits a PGN file into records on a reader thread, overlapping disk reads with parsing.
+
+    The reader thread reads blocks with read_lines, splits them into records with
+    iter_records and puts batches of about block_size bytes on a bounded queue. When
+    the queue is full the reader waits, so at most queue_size batches are in memory.
+
+    Args:
+        file_name (str): Path to the PGN file.
+        block_size (int): Bytes read per readinto call and per batch.
+        queue_size (int): Maximum number of batches waiting to be parsed.
+
+    Yields:
+        tuple[int, bytes]: The byte offset of each record and its raw bytes, in file order.
+    """
+
+    batches = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        """
+        Waits for room in the queue and adds item; returns False if the consumer has stopped.
+        """
+
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader() -> None:
+        """
+        Reads and splits the file, queuing batches of records, then None to mark the end.
+        """
+
+        try:
+            with open(file_name, 'rb', buffering=0) as file:
+                batch = []
+                batch_bytes = 0
+
+                for record in iter_records(read_lines(file, block_size)):
+                    batch.append(record)
+                    batch_bytes += len(record[1])
+
+                    if batch_bytes >= block_size:
+                        if not put(batch):
+                            return
+                        batch = []
+                        batch_bytes = 0
+
+                if batch:
+                    put(batch)
+
+        # Errors are passed to the consumer to be raised there.
+        except Exception as error:
+            put(error)
+        finally:
+            put(None)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            batch = batches.get()
+            if batch is None:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            yield from batch
+    finally:
+        stop.set()
+        thread.join()
+
+
+def check_record(record: bytes) -> tuple[str, dict, str]:
+    """
+    Validates one raw record and splits it into tags and move text.
+
+    Args:
+        record (bytes): The raw bytes of one game.
+
+    Returns:
+        tuple[str, dict, str]: (reason, tags, moves_str); reason is None for a valid game.
+    """
+
+    try:
+        text = record.decode('utf-8')
+    except UnicodeDecodeError:
+        return 'not utf-8', {}, ''
+
+    tags = {}
+    move_lines = []
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        # Tag lines come before the move text.
+        if line.startswith('[') and not move_lines:
+            match = TAG_LINE.match(line)
+            if match is None:
+                return 'malformed tag', {}, ''
+
+            tag, value = match.groups()
+            tags[tag.lower()] = sys.intern(value)
+        else:
+            move_lines.append(line)
+
+    moves_str = ' '.join(move_lines)
+
+    if not tags:
+        return 'missing tags', {}, ''
+    if not moves_str:
+        return 'missing moves', {}, ''
+    if moves_str.count('{') != moves_str.count('}'):
+        return 'unclosed comment', {}, ''
+
+    result = RESULT_AT_END.search(moves_str)
+    if result is None:
+        return 'truncated moves', {}, ''
+    if 'result' in tags and tags['result'] != result.group(1):
+        return 'result mismatch', {}, ''
+
+    return None, tags, moves_str
+
+
+def iter_games(file_name: str, quarantine_file: str = None, stats: IngestStats = None,
+               extra_tags: tuple[str, ...] = (), pipelined: bool = False,
+               block_size: int = DEFAULT_BLOCK_SIZE, queue_size: int = DEFAULT_QUEUE_SIZE):
+    """
+    Streams the valid games of a PGN file, quarantining malformed ones.
+
+    Args:
+        file_name (str): Path to the PGN file.
+        quarantine_file (str): Where to write rejected records (None = drop them).
+            Each record is preceded by a line "% offset <byte offset>: <reason>".
+        stats (IngestStats): Optional statistics to record into.
+        extra_tags (tuple[str, ...]): Additional tags to keep (see read_pgn).
+        pipelined (bool): If True, read and split the file on a reader thread
+            (see iter_records_pipelined) while this thread parses.
+        block_size (int): Bytes per read in pipelined mode.
+        queue_size (int): Batches the reader may run ahead in pipelined mode.
+
+    Yields:
+        dict: Each valid game in the read_pgn format.
+    """
+
+    quarantine = open(quarantine_file, 'wb') if quarantine_file is not None else None
+
+    try:
+        if pipelined:
+            yield from ingest_records(iter_records_pipelined(file_name, block_size, queue_size),
+                                       quarantine, stats, extra_tags)
+        else:
+            with open(file_name, 'rb') as file:
+                yield from ingest_records(iter_records(file), quarantine, stats, extra_tags)
+    finally:
+        if quarantine is not None:
+            quarantine.close()
+
+
+def ingest_records(records, quarantine, stats: IngestStats, extra_tags: tuple[str, ...]):
+    """
+    Checks and parses raw records, writing the malformed ones to quarantine.
+
+    Args:
+        records: Iterable of (byte offset, raw bytes) records.
+        quarantine: Binary file for rejected records, or None.
+        stats (IngestStats): Optional statistics to record into.
+        extra_tags (tuple[str, ...]): Additional tags to keep.
+
+    Yields:
+        dict: Each valid game in the read_pgn format.
+    """
+
+    for offset, record in records:
+        if stats is not None:
+            stats.bytes_read = offset + len(record)
+
+        reason, tags, moves_str = check_record(record)
+
+        # Set the bad record aside with where it was found, and carry on.
+        if reason is not None:
+            if stats is not None:
+                stats.reject(reason)
+            if quarantine is not None:
+                quarantine.write(f'% offset {offset}: {reason}\n'.encode('utf-8'))
+                quarantine.write(record.rstrip(b'\r\n') + b'\n\n')
+            continue
+
+        if stats is not None:
+            stats.games += 1
+
+        yield build_game(tags, moves_str, extra_tags)[0]
+
+
+def read_pgn_lenient(file_name: str, quarantine_file: str = None, stats: IngestStats = None,
+                     compact: bool = False, extra_tags: tuple[str, ...] = (), pipelined: bool = False) -> list[dict]:
+    """
+    Reads every valid game of a PGN file like read_pgn, quarantining malformed ones.
+
+    Args:
+        file_name (str): Path to the PGN file.
+        quarantine_file (str): Where to write rejected records (None = drop them).
+        stats (IngestStats): Optional statistics to record into.
+        compact (bool): If True, return Game records instead of dictionaries.
+        extra_tags (tuple[str, ...]): Additional tags to keep.
+        pipelined (bool): If True, overlap reading with parsing (see iter_games).
+
+    Returns:
+        list[dict]: The valid games.
+    """
+
+    games = iter_games(file_name, quarantine_file, stats, extra_tags, pipelined)
+
+    if compact:
+        return [Game.from_dict(game, extra_tags) for game in games]
+
+    return list(games)
+
+
+def main(argv: list[str]) -> int:
+    """
+    Ingests a PGN file and prints the ingest statistics as JSON.
+    """
+
+    parser = argparse.ArgumentParser(description='Ingest a PGN file, quarantining malformed games.')
+    parser.add_argument('file_name', help='PGN file to ingest')
+    parser.add_argument('--quarantine', help='file to write malformed games to')
+    parser.add_argument('--pipelined', action='store_true', help='read the file on a separate thread')
+    arguments = parser.parse_args(argv)
+
+    stats = IngestStats()
+    for _ in iter_games(arguments.file_name, arguments.quarantine, stats, pipelined=arguments.pipelined):
+        pass
+
+    print(json.dumps(stats.as_dict(), indent=2))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,172 @@
+"""
+Provides OpeningExplorer, a Lichess-style opening explorer over a GameTable: given
+the moves played so far it lists every next move with its number of games and
+white win / draw / black win counts.
+
+Each query is one grouped pass (a single bincount) over the games that follow the
+prefix, and answers are kept in a least-recently-used cache keyed by the prefix.
+The games of each cached prefix are kept too, so extending a line by one move only
+has to look at the games of its parent instead of the whole corpus.
+
+Author : Szeto Lok
+"""
+
+from collections import OrderedDict
+import numpy as np
+from game_table import *
+
+
+DEFAULT_CACHE_SIZE = 256
+
+
+class OpeningExplorer:
+    """
+    Next-move statistics for move prefixes, with an LRU cache.
+
+    Instance Variables:
+        table (GameTable): The encoded games.
+        cache_size (int): Maximum number of prefixes kept in the cache.
+        cache (OrderedDict): prefix tuple -> (rows, stats), least recently used first.
+        hits (int): Queries answered from the cache.
+        misses (int): Queries that had to be computed.
+    """
+
+    def __init__(self, table: GameTable, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        """
+        Initialize an explorer with an empty cache.
+
+        Arguments:
+            table (GameTable): The encoded games, e.g. from read_game_table.
+            cache_size (int): Maximum number of prefixes kept in the cache.
+        """
+
+        self.table = table
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+
+    def next_move_stats(self, prefix: list[str]) -> dict:
+        """
+        Lists every move played after a prefix with its game count and results.
+
+        Arguments:
+            prefix (list[str]): Moves (alternating white/black) played from the start position.
+
+        Returns:
+            dict: {move: (games, white_wins, draws, black_wins)}, most played move first
+                (ties keep order of first appearance in the move table).
+        """
+
+        return self._lookup(tuple(prefix))[1]
+
+
+    def rows(self, prefix: list[str]) -> np.ndarray:
+        """
+        Returns the rows of the games that start with a prefix (cached like next_move_stats).
+
+        Arguments:
+            prefix (list[str]): Moves (alternating white/black) played from the start position.
+
+        Returns:
+            np.ndarray: Row numbers in the table, in increasing order.
+        """
+
+        return self._lookup(tuple(prefix))[0]
+
+
+    def _lookup(self, prefix: tuple) -> tuple[np.ndarray, dict]:
+        """
+        Returns the rows and statistics of a prefix, from the cache when possible.
+
+        Arguments:
+            prefix (tuple): The move prefix.
+
+        Returns:
+            tuple[np.ndarray, dict]: Row numbers of the games following the prefix, and
+                the next_move_stats answer for it.
+        """
+
+        entry = self.cache.get(prefix)
+
+        # Cache hit: mark the prefix as the most recently used one.
+        if entry is not None:
+            self.hits += 1
+            self.cache.move_to_end(prefix)
+            return entry
+
+        self.misses += 1
+
+        entry = self._compute(prefix)
+        self.cache[prefix] = entry
+
+        # Evict the least recently used prefix once the cache is full.
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return entry
+
+
+    def _compute(self, prefix: tuple) -> tuple[np.ndarray, dict]:
+        """
+        Finds the games following a prefix and groups them by next move and result.
+
+        Arguments:
+            prefix (tuple): The move prefix.
+
+        Returns:
+            tuple[np.ndarray, dict]: See _lookup.
+        """
+
+        moves = self.table.moves
+        ply = len(prefix)
+
+        # Only the 40 stored plies can be matched.
+        if ply > moves.shape[1]:
+            return np.array([], dtype=np.int64), {}
+
+        # Narrow down from the parent's games, or from all games for the empty prefix.
+        if ply == 0:
+            rows = np.arange(len(self.table))
+        else:
+            code = self.table.move_table.codes.get(prefix[-1])
+            if code is None or code == NO_MOVE:
+                return np.array([], dtype=np.int64), {}
+
+            parent_rows = self._lookup(prefix[:-1])[0]
+            rows = parent_rows[moves[parent_rows, ply - 1] == code]
+
+        # A full-length prefix has games but no stored next moves.
+        if ply == moves.shape[1]:
+            return rows, {}
+
+        next_moves = moves[rows, ply]
+        results = self.table.columns['result'][rows]
+        number_of_moves = len(self.table.move_table)
+
+        # One bincount over (next move, result) pairs counts every cell at once;
+        # other results (e.g. '*') only count towards the number of games.
+        decided = results < len(RESULTS)
+        keys = next_moves[decided].astype(np.int64) * len(RESULTS) + results[decided]
+        counts = np.bincount(keys, minlength=number_of_moves * len(RESULTS)).reshape(number_of_moves, len(RESULTS))
+        totals = np.bincount(next_moves, minlength=number_of_moves)
+
+        # Games that ended at this ply have '-' as their next move.
+        totals[NO_MOVE] = 0
+
+        # Most played moves first; the stable sort keeps ties in code order.
+        order = np.argsort(-totals, kind='stable')
+        order = order[totals[order] > 0]
+
+        stats = {
+            self.table.move_table.decode(code): (
+                int(totals[code]),
+                int(counts[code, WHITE_WIN]),
+                int(counts[code, DRAW]),
+                int(counts[code, BLACK_WIN]),
+            )
+            for code in order
+        }
+
+        return rows, stats
@@ -0,0 +1,116 @@
+"""
+Provides PlayerIndex, a compressed sparse row (CSR) index from player name to the
+rows of their games in a GameTable. The rows of player p are
+row_ids[offsets[p]:offsets[p + 1]], so a lookup only touches that player's games
+instead of scanning the white and black columns of the whole table.
+
+Author : Szeto Lok
+"""
+
+from collections import Counter
+import numpy as np
+from game_table import *
+
+
+# Number of openings reported by player_stats.
+FAVOURITE_OPENINGS = 3
+
+
+class PlayerIndex:
+    """
+    Player name -> game rows, stored as CSR arrays.
+
+    Instance Variables:
+        table (GameTable): The encoded games.
+        players (StringTable): The code <-> name table of every player (white or black).
+        white_players (np.ndarray): Player code of the white player of each game.
+        black_players (np.ndarray): Player code of the black player of each game.
+        offsets (np.ndarray): int64 array (players + 1); player p's rows start at offsets[p].
+        row_ids (np.ndarray): int32 game rows grouped by player, in file order per player
+            (each game once per player, even if they played both colours).
+    """
+
+    def __init__(self, table: GameTable) -> None:
+        """
+        Builds the index with one sort over all (player, row) pairs.
+
+        Arguments:
+            table (GameTable): The encoded games, e.g. from read_game_table.
+        """
+
+        self.table = table
+
+        # White and black names have separate tables; merge them into one player table.
+        self.players = StringTable()
+        white_codes = np.array([self.players.encode(name) for name in table.tables['white'].strings], dtype=np.int32)
+        black_codes = np.array([self.players.encode(name) for name in table.tables['black'].strings], dtype=np.int32)
+        self.white_players = white_codes[table.columns['white']]
+        self.black_players = black_codes[table.columns['black']]
+
+        # Every game appears once for white and once for black, unless both names are the
+        # same (e.g. a test game against oneself), which must only count once.
+        rows = np.arange(len(table), dtype=np.int32)
+        different = self.black_players != self.white_players
+        pair_players = np.concatenate((self.white_players, self.black_players[different]))
+        pair_rows = np.concatenate((rows, rows[different]))
+
+        # Sort by player, then by row, and count the games of each player for the offsets.
+        order = np.lexsort((pair_rows, pair_players))
+        self.row_ids = pair_rows[order]
+        self.offsets = np.zeros(len(self.players) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pair_players, minlength=len(self.players)), out=self.offsets[1:])
+
+
+    def rows(self, name: str) -> np.ndarray:
+        """
+        Returns the rows of a player's games in file order.
+
+        Arguments:
+            name (str): The player's account name.
+
+        Returns:
+            np.ndarray: Game rows (empty if the player is unknown).
+        """
+
+        code = self.players.codes.get(name)
+        if code is None:
+            return self.row_ids[:0]
+
+        return self.row_ids[self.offsets[code]:self.offsets[code + 1]]
+
+
+    def player_stats(self, name: str) -> dict:
+        """
+        Summarises a player's games, reading only the rows of that player.
+
+        Arguments:
+            name (str): The player's account name.
+
+        Returns:
+            dict: 'games', 'wins', 'losses', 'draws', 'rating_trend' (the player's
+                rating in each game, in file order, skipping missing ratings) and
+                'favourite_openings' (up to 3 (opening, games) pairs, most played first).
+        """
+
+        rows = self.rows(name)
+        code = self.players.codes.get(name)
+
+        # Whether the player had the white pieces in each of their games.
+        as_white = self.white_players[rows] == code
+        results = self.table.columns['result'][rows]
+
+        wins = np.count_nonzero((as_white & (results == WHITE_WIN)) | (~as_white & (results == BLACK_WIN)))
+        losses = np.count_nonzero((as_white & (results == BLACK_WIN)) | (~as_white & (results == WHITE_WIN)))
+
+        ratings = np.where(as_white, self.table.white_elo[rows], self.table.black_elo[rows])
+        openings = Counter(self.table.columns['opening'][rows].tolist())
+
+        return {
+            'games': len(rows),
+            'wins': int(wins),
+            'losses': int(losses),
+            'draws': int(np.count_nonzero(results == DRAW)),
+            'rating_trend': ratings[ratings != MISSING_ELO].tolist(),
+            'favourite_openings': [(self.table.decode('opening', opening), count)
+                                   for opening, count in openings.most_common(FAVOURITE_OPENINGS)],
+        }
@@ -0,0 +1,174 @@
+"""
+Provides PositionIndex, win/draw/loss counts keyed by board position instead of by
+move order, so transpositions such as 1.d4 Nf6 2.c4 and 1.c4 Nf6 2.d4 are merged.
+
+Building the index replays the first plies of every game with python-chess (through
+binh_chess) and records the polyglot Zobrist hash of each position reached. The
+replay is the slow part, so it can be spread over worker processes. A query by FEN
+or by move list is then a single dictionary lookup.
+
+Author : Szeto Lok
+"""
+
+import multiprocessing
+import chess.polyglot
+from binh_chess import *
+from game_table import *
+
+
+# Number of plies replayed per game by default.
+DEFAULT_PLIES = 20
+
+
+def position_hashes(moves: list[str], plies: int = DEFAULT_PLIES) -> list[int]:
+    """
+    Returns the Zobrist hash of the start position and of each position after a move.
+
+    Args:
+        moves (list[str]): The moves of a game in SAN ('-' marks the end of the game).
+        plies (int): Maximum number of moves to replay.
+
+    Returns:
+        list[int]: Up to plies + 1 hashes; replay stops at '-' or at an illegal move.
+    """
+
+    board = chess.Board()
+    hashes = [chess.polyglot.zobrist_hash(board)]
+
+    for move in moves[:plies]:
+        if move == '-':
+            break
+
+        # A corrupt move ends the replay; the positions before it are still valid.
+        try:
+            board.push_san(move)
+        except ValueError:
+            break
+
+        hashes.append(chess.polyglot.zobrist_hash(board))
+
+    return hashes
+
+
+def replay_games(move_lists: list[list[str]], plies: int = DEFAULT_PLIES) -> list[list[int]]:
+    """
+    Replays a batch of games (run inside a worker process by PositionIndex.build).
+
+    Args:
+        move_lists (list[list[str]]): The moves of each game.
+        plies (int): Maximum number of moves to replay per game.
+
+    Returns:
+        list[list[int]]: The position hashes of each game.
+    """
+
+    return [position_hashes(moves, plies) for moves in move_lists]
+
+
+class PositionIndex:
+    """
+    Game counts and results for every position reached in the first plies of the games.
+
+    Instance Variables:
+        plies (int): Number of plies replayed per game.
+        counts (dict[int, list[int]]): Zobrist hash -> [white wins, black wins, draws,
+            games], in the order of the WHITE_WIN, BLACK_WIN and DRAW codes.
+    """
+
+    def __init__(self, plies: int = DEFAULT_PLIES) -> None:
+        """
+        Initialize an empty index.
+
+        Arguments:
+            plies (int): Number of plies replayed per game.
+        """
+
+        self.plies = plies
+        self.counts = {}
+
+
+    @classmethod
+    def build(cls, games: list[dict], plies: int = DEFAULT_PLIES, workers: int = None) -> 'PositionIndex':
+        """
+        Replays the games and indexes every position they reach.
+
+        Arguments:
+            games (list[dict]): Games as returned by read_pgn.
+            plies (int): Number of plies replayed per game.
+            workers (int): Number of worker processes for the replay (None or 1 = no workers).
+
+        Returns:
+            PositionIndex: The index of the games.
+        """
+
+        index = cls(plies)
+        move_lists = [[game[key] for key in MOVE_KEYS[:plies]] for game in games]
+
+        if workers is None or workers <= 1:
+            hash_lists = replay_games(move_lists, plies)
+        else:
+            # One batch per worker task keeps the pickling overhead low.
+            batch_size = max(1, -(-len(move_lists) // (workers * 4)))
+            batches = [move_lists[start:start + batch_size] for start in range(0, len(move_lists), batch_size)]
+
+            with multiprocessing.Pool(workers) as pool:
+                hash_lists = [hashes for batch in pool.starmap(replay_games, [(batch, plies) for batch in batches])
+                              for hashes in batch]
+
+        for game, hashes in zip(games, hash_lists):
+            index.add_game(hashes, game['result'])
+
+        return index
+
+
+    def add_game(self, hashes: list[int], result: str) -> None:
+        """
+        Counts one game for every distinct position it reached.
+
+        Arguments:
+            hashes (list[int]): The game's position hashes, from position_hashes.
+            result (str): The game result, e.g. '1-0'.
+        """
+
+        # A position repeated within one game still counts the game once.
+        for position in set(hashes):
+            entry = self.counts.get(position)
+            if entry is None:
+                entry = self.counts[position] = [0, 0, 0, 0]
+
+            if result in RESULTS:
+                entry[RESULTS.index(result)] += 1
+            entry[3] += 1
+
+
+    def stats(self, position) -> tuple[int, int, int, int]:
+        """
+        Looks up the games that reached a position, in any move order.
+
+        Arguments:
+            position (str | list[str]): A FEN string, or the moves leading to the position.
+                Positions more than plies moves deep are not indexed.
+
+        Returns:
+            tuple[int, int, int, int]: (games, white_wins, draws, black_wins).
+        """
+
+        if isinstance(position, str):
+            key = chess.polyglot.zobrist_hash(chess.Board(position))
+        else:
+            board = chess.Board()
+            for move in position:
+                board.push_san(move)
+            key = chess.polyglot.zobrist_hash(board)
+
+        entry = self.counts.get(key, [0, 0, 0, 0])
+
+        return (entry[3], entry[WHITE_WIN], entry[DRAW], entry[BLACK_WIN])
+
+
+    def __len__(self) -> int:
+        """
+        Returns the number of distinct positions in the index.
+        """
+
+        return len(self.counts)
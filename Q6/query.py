@@ -0,0 +1,415 @@
+"""
+Provides a small query API that combines the opening, player, date, move-prefix
+and Elo-difference filters in one evaluation, e.g.
+
+    query(games).where(elo_diff=(0, 200), prefix=['e4', 'e5']).group_by('opening').wins()
+
+A GameDatabase holds a GameTable and builds its indexes on first use (opening ->
+rows, time order, PlayerIndex and OpeningExplorer). To answer a query, the planner
+reads how many rows each index-backed filter selects from the indexes (offsets and
+binary searches, no rows are gathered), builds the rows of the smallest filter only,
+and checks every other filter on those rows with one combined boolean mask.
+
+Author : Szeto Lok
+"""
+
+import numpy as np
+from game_table import *
+from time_index import *
+from opening_explorer import *
+from player_index import *
+
+
+# Filters that can be answered from an index, in the order they are tried on ties.
+INDEXED_FILTERS = ('player', 'opening', 'date', 'prefix')
+
+# Every supported filter.
+FILTERS = INDEXED_FILTERS + ('elo_diff',)
+
+
+class GameDatabase:
+    """
+    A GameTable together with lazily built indexes for the query planner.
+
+    Instance Variables:
+        table (GameTable): The encoded games.
+    """
+
+    def __init__(self, table: GameTable) -> None:
+        """
+        Initialize the database; no index is built until a query needs it.
+
+        Arguments:
+            table (GameTable): The encoded games. Date filters need the table to be
+                read with extra_tags=TIME_TAGS.
+        """
+
+        self.table = table
+        self._opening_index = None
+        self._time_order = None
+        self._timestamps = None
+        self._players = None
+        self._explorer = None
+
+
+    def query(self) -> 'Query':
+        """
+        Returns a query over every game of the database.
+        """
+
+        return Query(self)
+
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """
+        Returns the int64 timestamp of every game (MISSING_TIMESTAMP when unknown).
+        """
+
+        if self._timestamps is None:
+            if 'utcdate' not in self.table.columns or 'utctime' not in self.table.columns:
+                raise ValueError("Date filters need games read with extra_tags=TIME_TAGS")
+
+            # Convert each distinct date and time string once, then gather by code.
+            dates = np.array([timestamp(value) for value in self.table.tables['utcdate'].strings], dtype=np.int64)
+            times = np.array([timestamp('1970.01.01', value) for value in self.table.tables['utctime'].strings],
+                             dtype=np.int64)
+
+            date_values = dates[self.table.columns['utcdate']]
+            self._timestamps = np.where(date_values == MISSING_TIMESTAMP, MISSING_TIMESTAMP,
+                                        date_values + times[self.table.columns['utctime']])
+
+        return self._timestamps
+
+
+    @property
+    def players(self) -> PlayerIndex:
+        """
+        Returns the player index, building it on first use.
+        """
+
+        if self._players is None:
+            self._players = PlayerIndex(self.table)
+
+        return self._players
+
+
+    @property
+    def explorer(self) -> OpeningExplorer:
+        """
+        Returns the opening explorer whose cached prefix rows answer prefix filters.
+        """
+
+        if self._explorer is None:
+            self._explorer = OpeningExplorer(self.table)
+
+        return self._explorer
+
+
+    def opening_index(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the CSR opening index (offsets, row_ids), building it on first use.
+        The rows of opening code c are row_ids[offsets[c]:offsets[c + 1]].
+        """
+
+        if self._opening_index is None:
+            openings = self.table.columns['opening']
+            row_ids = np.argsort(openings, kind='stable').astype(np.int32)
+            offsets = np.zeros(len(self.table.tables['opening']) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(openings, minlength=len(offsets) - 1), out=offsets[1:])
+            self._opening_index = (offsets, row_ids)
+
+        return self._opening_index
+
+
+    def opening_count(self, codes: np.ndarray) -> int:
+        """
+        Returns the number of games with any of the given opening codes, from the offsets alone.
+        """
+
+        offsets = self.opening_index()[0]
+
+        return int((offsets[codes + 1] - offsets[codes]).sum())
+
+
+    def opening_rows(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Returns the rows of games with any of the given opening codes, in increasing order.
+        """
+
+        offsets, row_ids = self.opening_index()
+        parts = [row_ids[offsets[code]:offsets[code + 1]] for code in codes]
+
+        # One opening's rows are already in order; only several need merging.
+        if len(parts) == 1:
+            return parts[0]
+
+        return np.sort(np.concatenate(parts)) if parts else row_ids[:0]
+
+
+    def date_bounds(self, start: int, end: int) -> tuple[int, int]:
+        """
+        Returns the positions [first, last) of the range [start, end) in time order, by binary search.
+        """
+
+        if self._time_order is None:
+            order = np.argsort(self.timestamps, kind='stable')
+            self._time_order = (order, self.timestamps[order])
+
+        sorted_timestamps = self._time_order[1]
+        first = int(np.searchsorted(sorted_timestamps, max(start if start is not None else 0, 0), side='left'))
+        last = len(sorted_timestamps) if end is None else int(np.searchsorted(sorted_timestamps, end, side='left'))
+
+        return first, max(first, last)
+
+
+    def date_rows(self, start: int, end: int) -> np.ndarray:
+        """
+        Returns the rows of games played in [start, end), in increasing order.
+        """
+
+        first, last = self.date_bounds(start, end)
+
+        return np.sort(self._time_order[0][first:last])
+
+
+class Query:
+    """
+    An immutable description of a filtered (and optionally grouped) question.
+
+    Instance Variables:
+        database (GameDatabase): The games and their indexes.
+        filters (dict): Filter name -> argument, see where().
+        group (str): Tag to group results by, or None.
+    """
+
+    def __init__(self, database: GameDatabase, filters: dict = None, group: str = None) -> None:
+        """
+        Initialize a query; use GameDatabase.query() or query() instead.
+        """
+
+        self.database = database
+        self.filters = filters or {}
+        self.group = group
+
+
+    def where(self, **filters) -> 'Query':
+        """
+        Returns a query with more filters. All filters must hold for a game to match.
+
+        Arguments:
+            opening (str | list[str]): Opening name(s).
+            player (str): Account name playing either colour.
+            date (tuple[int, int]): [start, end) timestamps (see time_index.py); either may be
+                None. Games without a date never match.
+            prefix (list[str]): Moves the game must start with.
+            elo_diff (tuple[int, int]): (lower, upper), exclusive bounds on the absolute
+                rating difference, as in win_loss_by_elo.
+
+        Returns:
+            Query: The new query (this one is unchanged).
+        """
+
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown filters: {sorted(unknown)}")
+
+        return Query(self.database, {**self.filters, **filters}, self.group)
+
+
+    def group_by(self, tag: str) -> 'Query':
+        """
+        Returns a query whose wins() are counted per value of a tag, e.g. 'opening'.
+        """
+
+        if tag not in self.database.table.columns:
+            raise ValueError(f"Cannot group by {tag!r}: it is not a column of the table")
+
+        return Query(self.database, self.filters, tag)
+
+
+    def plan(self) -> list[tuple[str, int]]:
+        """
+        Orders the filters for evaluation.
+
+        Returns:
+            list[tuple[str, int]]: (filter, rows it selects) with the most selective
+                index-backed filter first; the remaining filters (row count -1 when
+                unknown) are checked together on the rows of the first one.
+        """
+
+        sizes = []
+        for name in INDEXED_FILTERS:
+            if name in self.filters:
+                sizes.append((self._index_size(name), INDEXED_FILTERS.index(name), name))
+
+        indexed = [(name, size) for size, _, name in sorted(sizes)]
+        residual = [(name, -1) for name in FILTERS if name in self.filters and name not in INDEXED_FILTERS]
+
+        return indexed + residual
+
+
+    def rows(self) -> np.ndarray:
+        """
+        Returns the rows of the matching games, in increasing order.
+        """
+
+        plan = self.plan()
+
+        # Start from the smallest index-backed row set, or from every game.
+        if plan and plan[0][0] in INDEXED_FILTERS:
+            rows = self._index_rows(plan[0][0])
+            remaining = [name for name, _ in plan[1:]]
+        else:
+            rows = np.arange(len(self.database.table))
+            remaining = [name for name, _ in plan]
+
+        # Check every other filter on those rows only, combined into one mask.
+        mask = np.ones(len(rows), dtype=bool)
+        for name in remaining:
+            mask &= self._row_mask(name, rows)
+
+        return rows[mask]
+
+
+    def count(self) -> int:
+        """
+        Returns the number of matching games.
+        """
+
+        return len(self.rows())
+
+
+    def wins(self):
+        """
+        Counts white and black wins of the matching games.
+
+        Returns:
+            tuple[int, int] | dict: (white_wins, black_wins), or with group_by
+                {value: (white_wins, black_wins)} for every value with matching games.
+        """
+
+        table = self.database.table
+        rows = self.rows()
+        results = table.columns['result'][rows]
+
+        if self.group is None:
+            return int(np.count_nonzero(results == WHITE_WIN)), int(np.count_nonzero(results == BLACK_WIN))
+
+        groups = table.columns[self.group][rows]
+        number_of_groups = len(table.tables[self.group])
+        white_wins = np.bincount(groups[results == WHITE_WIN], minlength=number_of_groups)
+        black_wins = np.bincount(groups[results == BLACK_WIN], minlength=number_of_groups)
+
+        return {
+            table.decode(self.group, code): (int(white_wins[code]), int(black_wins[code]))
+            for code in np.flatnonzero(np.bincount(groups, minlength=number_of_groups))
+        }
+
+
+    def _index_size(self, name: str) -> int:
+        """
+        Returns how many rows one index-backed filter selects, without building the rows.
+        """
+
+        database = self.database
+        value = self.filters[name]
+
+        # CSR offsets, binary search, or the explorer's cached rows (reused by _index_rows).
+        if name == 'player':
+            return len(database.players.rows(value))
+        if name == 'opening':
+            return database.opening_count(self._opening_codes())
+        if name == 'date':
+            first, last = database.date_bounds(*value)
+            return last - first
+
+        return len(database.explorer.rows(value))
+
+
+    def _index_rows(self, name: str) -> np.ndarray:
+        """
+        Returns the rows selected by one index-backed filter, in increasing order.
+        """
+
+        database = self.database
+        value = self.filters[name]
+
+        if name == 'player':
+            return database.players.rows(value)
+        if name == 'opening':
+            return database.opening_rows(self._opening_codes())
+        if name == 'date':
+            return database.date_rows(*value)
+
+        return database.explorer.rows(value)
+
+
+    def _row_mask(self, name: str, rows: np.ndarray) -> np.ndarray:
+        """
+        Evaluates one filter on the given rows.
+        """
+
+        table = self.database.table
+        value = self.filters[name]
+
+        if name == 'player':
+            code = self.database.players.players.codes.get(value, -1)
+            return (self.database.players.white_players[rows] == code) | (self.database.players.black_players[rows] == code)
+
+        if name == 'opening':
+            return np.isin(table.columns['opening'][rows], self._opening_codes())
+
+        if name == 'date':
+            start, end = value
+            timestamps = self.database.timestamps[rows]
+            mask = timestamps >= max(start if start is not None else 0, 0)
+            return mask & (timestamps < end) if end is not None else mask
+
+        if name == 'prefix':
+            codes = [table.move_table.codes.get(move, -1) for move in value]
+            if len(codes) > table.moves.shape[1] or NO_MOVE in codes:
+                return np.zeros(len(rows), dtype=bool)
+            return (table.moves[rows, :len(codes)] == np.array(codes, dtype=np.int32)).all(axis=1)
+
+        # elo_diff: both ratings known and the gap strictly inside the bounds.
+        lower, upper = value
+        white_elo = table.white_elo[rows]
+        black_elo = table.black_elo[rows]
+        difference = np.abs(white_elo - black_elo)
+        return (white_elo != MISSING_ELO) & (black_elo != MISSING_ELO) & (difference > lower) & (difference < upper)
+
+
+    def _opening_codes(self) -> np.ndarray:
+        """
+        Returns the codes of the opening filter's names (unknown names are ignored).
+        """
+
+        names = self.filters['opening']
+        names = [names] if isinstance(names, str) else names
+        codes = self.database.table.tables['opening'].codes
+
+        return np.unique(np.array([codes[name] for name in names if name in codes], dtype=np.int64))
+
+
+def query(games) -> Query:
+    """
+    Starts a query over games.
+
+    Args:
+        games (GameDatabase | GameTable | list[dict]): The games. Keep a GameDatabase
+            to reuse its indexes across queries; a list is encoded into a table first.
+
+    Returns:
+        Query: A query matching every game; refine it with where() and group_by().
+    """
+
+    if isinstance(games, GameDatabase):
+        return games.query()
+
+    if not isinstance(games, GameTable):
+        # Keep any extra tags the games were read with (e.g. 'eco' or TIME_TAGS).
+        extra_tags = tuple(key for key in games[0] if key not in GAME_KEYS) if games else ()
+        games = GameTable.from_games(games, GAME_TAGS + extra_tags)
+
+    return GameDatabase(games).query()
@@ -0,0 +1,221 @@
+"""
+Provides ResultCube, a precomputed count of games by opening (or any other tag such
+as 'eco'), white Elo bucket, black Elo bucket and result, stored as one dense numpy
+array. Slices and roll-ups are sums over array axes, so questions such as "white
+wins per opening when both players are rated 1800-2200" need no pass over the games.
+
+The cube can be filled in one vectorised step from a GameTable, or one game at a
+time with add_game while a file is being read.
+
+Author : Szeto Lok
+"""
+
+import numpy as np
+from game_table import *
+
+
+DEFAULT_BUCKET_SIZE = 100
+DEFAULT_MAX_ELO = 3000
+
+
+class ResultCube:
+    """
+    Dense game counts indexed by [opening, white bucket, black bucket, result].
+
+    Ratings are grouped in buckets of bucket_size points; ratings of max_elo or more
+    (max_elo rounded down to a bucket) share an overflow bucket after the last regular
+    one, and missing ratings get a bucket of their own after that.
+
+    Instance Variables:
+        key (str): The tag used for the first dimension, e.g. 'opening' or 'eco'.
+        bucket_size (int): Elo points per bucket.
+        overflow_bucket (int): Index of the bucket of ratings of max_elo or more.
+        number_of_buckets (int): Rating buckets, including the overflow and missing-rating buckets.
+        openings (StringTable): The code <-> name table of the first dimension.
+        counts (np.ndarray): int64 array (capacity, buckets, buckets, 3); rows past
+            len(openings) are spare capacity for openings added later.
+    """
+
+    def __init__(self, key: str = 'opening', bucket_size: int = DEFAULT_BUCKET_SIZE,
+                 max_elo: int = DEFAULT_MAX_ELO) -> None:
+        """
+        Initialize an empty cube.
+
+        Arguments:
+            key (str): The tag used for the first dimension.
+            bucket_size (int): Elo points per bucket.
+            max_elo (int): Ratings from here on share the overflow bucket.
+        """
+
+        self.key = key
+        self.bucket_size = bucket_size
+        self.overflow_bucket = max_elo // bucket_size
+        self.number_of_buckets = self.overflow_bucket + 2
+        self.openings = StringTable()
+        self.counts = np.zeros((16, self.number_of_buckets, self.number_of_buckets, len(RESULTS)), dtype=np.int64)
+
+
+    @classmethod
+    def from_table(cls, table: GameTable, key: str = 'opening', bucket_size: int = DEFAULT_BUCKET_SIZE,
+                   max_elo: int = DEFAULT_MAX_ELO) -> 'ResultCube':
+        """
+        Builds a cube from an encoded GameTable with one bincount.
+
+        Arguments:
+            table (GameTable): The encoded games.
+            key (str): The tag used for the first dimension.
+            bucket_size (int): Elo points per bucket.
+            max_elo (int): Ratings from here on share the overflow bucket.
+
+        Returns:
+            ResultCube: The filled cube.
+        """
+
+        cube = cls(key, bucket_size, max_elo)
+
+        # The cube reuses the table's codes for the first dimension.
+        for name in table.tables[key].strings:
+            cube.openings.encode(name)
+        cube._reserve(len(cube.openings))
+
+        # Games with other results (e.g. '*') have no result slot.
+        results = table.columns['result']
+        decided = results < len(RESULTS)
+
+        # Turn every game into one flat index into the cube and count them all at once.
+        shape = cube.counts.shape
+        flat = np.ravel_multi_index((
+            table.columns[key][decided],
+            cube.bucket(table.white_elo[decided]),
+            cube.bucket(table.black_elo[decided]),
+            results[decided],
+        ), shape)
+        cube.counts += np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+
+        return cube
+
+
+    def bucket(self, elo):
+        """
+        Returns the bucket of a rating (or of every rating in an array).
+
+        Arguments:
+            elo (int | np.ndarray): Ratings, MISSING_ELO when not known.
+
+        Returns:
+            int | np.ndarray: Bucket indices.
+        """
+
+        buckets = np.minimum(np.asarray(elo) // self.bucket_size, self.overflow_bucket)
+
+        return np.where(np.asarray(elo) == MISSING_ELO, self.overflow_bucket + 1, buckets)
+
+
+    def add_game(self, game: dict) -> None:
+        """
+        Counts one more game, e.g. while games are being streamed from a file.
+
+        Arguments:
+            game (dict): A game as returned by read_pgn (dictionary or Game record).
+        """
+
+        result = game['result']
+        if result not in RESULTS:
+            return
+
+        code = self.openings.encode(game[self.key])
+        self._reserve(len(self.openings))
+
+        white_bucket = int(self.bucket(_elo_value(game['whiteelo'])))
+        black_bucket = int(self.bucket(_elo_value(game['blackelo'])))
+        self.counts[code, white_bucket, black_bucket, RESULTS.index(result)] += 1
+
+
+    def _reserve(self, size: int) -> None:
+        """
+        Grows the first dimension (doubling) until it holds size openings.
+        """
+
+        capacity = len(self.counts)
+        if size <= capacity:
+            return
+
+        while capacity < size:
+            capacity *= 2
+
+        grown = np.zeros((capacity,) + self.counts.shape[1:], dtype=self.counts.dtype)
+        grown[:len(self.counts)] = self.counts
+        self.counts = grown
+
+
+    def _bucket_range(self, elo_range: tuple[int, int]) -> slice:
+        """
+        Converts a [low, high) rating range into a slice of rating buckets.
+
+        Both bounds must be multiples of bucket_size, as the cube cannot split a bucket,
+        and low cannot lie inside the overflow bucket. A high bound above max_elo takes
+        the whole overflow bucket, which has no upper limit. None means all buckets,
+        including games with a missing rating.
+        """
+
+        if elo_range is None:
+            return slice(None)
+
+        low, high = elo_range
+        if low % self.bucket_size or high % self.bucket_size:
+            raise ValueError(f"Elo range {elo_range} is not aligned to buckets of {self.bucket_size} points")
+        if low // self.bucket_size > self.overflow_bucket:
+            raise ValueError(f"Elo range {elo_range} starts inside the overflow bucket "
+                             f"(ratings of {self.overflow_bucket * self.bucket_size} or more)")
+
+        first = low // self.bucket_size
+        last = high // self.bucket_size
+
+        # Any high bound past the regular buckets ends after the overflow bucket.
+        return slice(first, last if last <= self.overflow_bucket else self.overflow_bucket + 1)
+
+
+    def slice(self, white_elo: tuple[int, int] = None, black_elo: tuple[int, int] = None) -> np.ndarray:
+        """
+        Returns the result counts per opening for games within both rating ranges.
+        Range bounds must be multiples of bucket_size, otherwise ValueError is raised.
+
+        Arguments:
+            white_elo (tuple[int, int]): [low, high) range of the white rating, or None for any.
+            black_elo (tuple[int, int]): [low, high) range of the black rating, or None for any.
+
+        Returns:
+            np.ndarray: int64 array (openings, 3) indexed by opening code and result code.
+        """
+
+        cells = self.counts[:len(self.openings), self._bucket_range(white_elo), self._bucket_range(black_elo)]
+
+        return cells.sum(axis=(1, 2))
+
+
+    def win_loss_by_opening(self, white_elo: tuple[int, int] = None, black_elo: tuple[int, int] = None) -> dict:
+        """
+        Rolls the cube up into the win_loss_by_opening format.
+
+        Arguments:
+            white_elo (tuple[int, int]): [low, high) range of the white rating, or None for any.
+            black_elo (tuple[int, int]): [low, high) range of the black rating, or None for any.
+
+        Returns:
+            dict: {opening_name: (white_wins, black_wins)} for openings with games in range.
+        """
+
+        counts = self.slice(white_elo, black_elo)
+
+        return {
+            self.openings.decode(code): (int(counts[code, WHITE_WIN]), int(counts[code, BLACK_WIN]))
+            for code in np.flatnonzero(counts.sum(axis=1) > 0)
+        }
+
+
+def _elo_value(value: str) -> int:
+    """
+    Converts a rating tag to an int, MISSING_ELO when it is not a number.
+    """
+
+    return int(value) if value.isdigit() else MISSING_ELO
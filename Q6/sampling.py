@@ -0,0 +1,219 @@
+"""
+Provides approximate versions of win_loss_by_opening, win_loss_by_elo and
+win_loss_by_moves that answer from a reproducible random sample of the games.
+Every count comes with a confidence interval (Wilson score interval scaled up to the
+full corpus); counts whose interval is too wide are recomputed exactly.
+
+Author : Szeto Lok
+"""
+
+import random
+from collections import namedtuple
+from statistics import NormalDist
+from task6 import *
+
+
+# An estimated count with its confidence interval. exact is True when the value was
+# computed from all games (then low == value == high).
+Estimate = namedtuple('Estimate', ['value', 'low', 'high', 'exact'])
+
+DEFAULT_FRACTION = 0.01
+DEFAULT_MAX_RELATIVE_ERROR = 0.2
+DEFAULT_CONFIDENCE = 0.95
+
+
+def sample_games(games: list[dict], fraction: float, seed: int = 0) -> list[dict]:
+    """
+    Returns a reproducible random sample of the games, in their original order.
+
+    Args:
+        games (list[dict]): Games as returned by read_pgn.
+        fraction (float): Share of the games to keep (at least one game is kept).
+        seed (int): Random seed; the same seed always gives the same sample.
+
+    Returns:
+        list[dict]: The sampled games.
+    """
+
+    sample_size = min(len(games), max(1, round(len(games) * fraction)))
+    rows = sorted(random.Random(seed).sample(range(len(games)), sample_size))
+
+    return [games[row] for row in rows]
+
+
+def estimate_count(sample_count: int, sample_size: int, population_size: int, confidence: float) -> Estimate:
+    """
+    Scales a count in a sample up to the whole corpus with a Wilson score interval.
+
+    Args:
+        sample_count (int): Number of matching games in the sample.
+        sample_size (int): Number of games in the sample.
+        population_size (int): Number of games in the whole corpus.
+        confidence (float): Confidence level of the interval, e.g. 0.95.
+
+    Returns:
+        Estimate: The estimated count in the corpus and its interval.
+    """
+
+    # A sample that is the whole corpus is exact
+    if sample_size == population_size:
+        return Estimate(sample_count, sample_count, sample_count, True)
+
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    proportion = sample_count / sample_size
+
+    # Wilson score interval for the proportion of matching games
+    denominator = 1 + z * z / sample_size
+    centre = (proportion + z * z / (2 * sample_size)) / denominator
+    half_width = z * ((proportion * (1 - proportion) + z * z / (4 * sample_size)) / sample_size) ** 0.5 / denominator
+
+    return Estimate(
+        proportion * population_size,
+        max(0.0, centre - half_width) * population_size,
+        min(1.0, centre + half_width) * population_size,
+        False,
+    )
+
+
+def is_too_wide(estimate: Estimate, max_relative_error: float) -> bool:
+    """
+    Decides whether an interval is too wide to be useful.
+
+    Args:
+        estimate (Estimate): The estimated count.
+        max_relative_error (float): Largest accepted half-width as a share of the value.
+
+    Returns:
+        bool: True if the count should be computed exactly instead.
+    """
+
+    if estimate.exact:
+        return False
+
+    # A count never seen in the sample has no meaningful relative error
+    if estimate.value == 0:
+        return True
+
+    return (estimate.high - estimate.low) / 2 > max_relative_error * estimate.value
+
+
+def exact_estimate(count: int) -> Estimate:
+    """
+    Wraps an exact count as an Estimate.
+    """
+
+    return Estimate(count, count, count, True)
+
+
+def approximate_win_loss_by_opening(games: list[dict], fraction: float = DEFAULT_FRACTION, seed: int = 0,
+                                    max_relative_error: float = DEFAULT_MAX_RELATIVE_ERROR,
+                                    confidence: float = DEFAULT_CONFIDENCE) -> dict:
+    """
+    Estimates win_loss_by_opening from a sample of the games.
+
+    Openings whose white or black win interval is too wide are counted exactly. That
+    includes openings that never occur in the sample, whose interval is unbounded.
+
+    Args:
+        games (list[dict]): Games as returned by read_pgn.
+        fraction (float): Share of the games to sample.
+        seed (int): Random seed for the sample.
+        max_relative_error (float): Largest accepted interval half-width as a share of the count.
+        confidence (float): Confidence level of the intervals.
+
+    Returns:
+        dict: {opening_name: (white_wins, black_wins)} with each count an Estimate,
+            for every opening of the games.
+    """
+
+    sample = sample_games(games, fraction, seed)
+    sample_result = win_loss_by_opening(sample)
+
+    results = {}
+    too_wide = set()
+
+    for opening, (white_count, black_count) in sample_result.items():
+        white_wins = estimate_count(white_count, len(sample), len(games), confidence)
+        black_wins = estimate_count(black_count, len(sample), len(games), confidence)
+        results[opening] = (white_wins, black_wins)
+
+        if is_too_wide(white_wins, max_relative_error) or is_too_wide(black_wins, max_relative_error):
+            too_wide.add(opening)
+
+    # Openings missing from the sample have no estimate at all, so they are uncertain too
+    too_wide.update({game['opening'] for game in games} - results.keys())
+
+    # Count the uncertain openings exactly in one pass over their games
+    if too_wide:
+        exact_result = win_loss_by_opening([game for game in games if game['opening'] in too_wide])
+
+        for opening in too_wide:
+            white_count, black_count = exact_result[opening]
+            results[opening] = (exact_estimate(white_count), exact_estimate(black_count))
+
+    return results
+
+
+def approximate_win_loss_by_elo(games: list[dict], lower: int, upper: int, fraction: float = DEFAULT_FRACTION,
+                                seed: int = 0, max_relative_error: float = DEFAULT_MAX_RELATIVE_ERROR,
+                                confidence: float = DEFAULT_CONFIDENCE) -> tuple[Estimate, Estimate]:
+    """
+    Estimates win_loss_by_elo from a sample, falling back to the exact answer if an interval is too wide.
+
+    Args:
+        games (list[dict]): Games as returned by read_pgn.
+        lower (int): Lower bound (exclusive) for ELO difference.
+        upper (int): Upper bound (exclusive) for ELO difference.
+        fraction (float): Share of the games to sample.
+        seed (int): Random seed for the sample.
+        max_relative_error (float): Largest accepted interval half-width as a share of the count.
+        confidence (float): Confidence level of the intervals.
+
+    Returns:
+        tuple[Estimate, Estimate]: (lower_elo_wins, higher_elo_wins).
+    """
+
+    sample = sample_games(games, fraction, seed)
+    lower_count, higher_count = win_loss_by_elo(sample, lower, upper)
+
+    estimates = (
+        estimate_count(lower_count, len(sample), len(games), confidence),
+        estimate_count(higher_count, len(sample), len(games), confidence),
+    )
+
+    if any(is_too_wide(estimate, max_relative_error) for estimate in estimates):
+        return tuple(exact_estimate(count) for count in win_loss_by_elo(games, lower, upper))
+
+    return estimates
+
+
+def approximate_win_loss_by_moves(games: list[dict], moves: list[str], fraction: float = DEFAULT_FRACTION,
+                                  seed: int = 0, max_relative_error: float = DEFAULT_MAX_RELATIVE_ERROR,
+                                  confidence: float = DEFAULT_CONFIDENCE) -> tuple[Estimate, Estimate]:
+    """
+    Estimates win_loss_by_moves from a sample, falling back to the exact answer if an interval is too wide.
+
+    Args:
+        games (list[dict]): Games as returned by read_pgn.
+        moves (list[str]): Moves (alternating white/black) to match at the start of each game.
+        fraction (float): Share of the games to sample.
+        seed (int): Random seed for the sample.
+        max_relative_error (float): Largest accepted interval half-width as a share of the count.
+        confidence (float): Confidence level of the intervals.
+
+    Returns:
+        tuple[Estimate, Estimate]: (white_win_count, black_win_count).
+    """
+
+    sample = sample_games(games, fraction, seed)
+    white_count, black_count = win_loss_by_moves(sample, moves)
+
+    estimates = (
+        estimate_count(white_count, len(sample), len(games), confidence),
+        estimate_count(black_count, len(sample), len(games), confidence),
+    )
+
+    if any(is_too_wide(estimate, max_relative_error) for estimate in estimates):
+        return tuple(exact_estimate(count) for count in win_loss_by_moves(games, moves))
+
+    return estimates
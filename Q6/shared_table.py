@@ -0,0 +1,229 @@
+"""
+Provides SharedGameTable, which places the numeric columns of a GameTable (move
+codes, ratings, results, opening and other tag codes) in multiprocessing.shared_memory
+blocks. Worker processes attach to the blocks by name and read the same physical
+memory instead of receiving their own pickled copy of the games.
+
+Only a small handle (block names, shapes, dtypes and the string lookup tables) is
+sent to the workers. The process that exported the table owns the blocks and must
+call unlink() when every worker is done.
+
+Author : Szeto Lok
+"""
+
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from game_table import *
+
+
+def _open_block(name: str) -> shared_memory.SharedMemory:
+    """
+    Attaches to an existing block created by another process.
+
+    Args:
+        name (str): The block name from a handle.
+
+    Returns:
+        shared_memory.SharedMemory: The attached block.
+    """
+
+    # Python 3.13+ can skip tracking. Before that, processes started by multiprocessing
+    # share the exporter's resource tracker, where registering the block again is harmless.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedGameTable:
+    """
+    A GameTable whose arrays live in shared memory.
+
+    Instance Variables:
+        table (GameTable): The table; its arrays are views of the shared blocks.
+        handle (dict): Everything a worker needs to attach (picklable and small).
+        blocks (list[shared_memory.SharedMemory]): The blocks, kept open while the table is used.
+        owner (bool): True in the process that created the blocks.
+    """
+
+    def __init__(self, table: GameTable, handle: dict, blocks: list, owner: bool) -> None:
+        """
+        Initialize from a table built on shared blocks; use export or attach instead.
+        """
+
+        self.table = table
+        self.handle = handle
+        self.blocks = blocks
+        self.owner = owner
+
+
+    @classmethod
+    def export(cls, table: GameTable) -> 'SharedGameTable':
+        """
+        Copies the arrays of a table into new shared memory blocks.
+
+        Arguments:
+            table (GameTable): The encoded games.
+
+        Returns:
+            SharedGameTable: The shared copy; pass its handle to the workers.
+        """
+
+        arrays = {'moves': table.moves, 'white_elo': table.white_elo, 'black_elo': table.black_elo}
+        arrays.update({f'column:{tag}': column for tag, column in table.columns.items()})
+
+        blocks = []
+        array_handles = {}
+
+        for name, array in arrays.items():
+            # Zero-sized blocks are not allowed, so empty tables still get one byte.
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+
+            blocks.append(block)
+            array_handles[name] = (block.name, array.shape, array.dtype.str)
+
+        handle = {
+            'arrays': array_handles,
+            'tables': {tag: list(string_table.strings) for tag, string_table in table.tables.items()},
+            'moves': list(table.move_table.strings),
+        }
+
+        return cls(cls._build_table(handle, blocks), handle, blocks, owner=True)
+
+
+    @classmethod
+    def attach(cls, handle: dict) -> 'SharedGameTable':
+        """
+        Attaches to the blocks of an exported table, e.g. inside a worker process.
+
+        Arguments:
+            handle (dict): The handle of the exported SharedGameTable.
+
+        Returns:
+            SharedGameTable: A table reading the shared blocks directly (no copy).
+        """
+
+        blocks = [_open_block(block_name) for block_name, _, _ in handle['arrays'].values()]
+
+        return cls(cls._build_table(handle, blocks), handle, blocks, owner=False)
+
+
+    @staticmethod
+    def _build_table(handle: dict, blocks: list) -> GameTable:
+        """
+        Wraps the shared blocks in numpy arrays and rebuilds the GameTable around them.
+        """
+
+        arrays = {}
+        for (name, (_, shape, dtype)), block in zip(handle['arrays'].items(), blocks):
+            arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+        tables = {tag: StringTable(tuple(strings)) for tag, strings in handle['tables'].items()}
+        columns = {tag: arrays[f'column:{tag}'] for tag in tables}
+
+        return GameTable(tables, columns, StringTable(tuple(handle['moves'])),
+                         arrays['moves'], arrays['white_elo'], arrays['black_elo'])
+
+
+    def close(self) -> None:
+        """
+        Releases this process's view of the blocks (the table must not be used afterwards).
+        """
+
+        # The numpy views must go before the memory they point into can be closed.
+        self.table = None
+        for block in self.blocks:
+            block.close()
+
+
+    def unlink(self) -> None:
+        """
+        Closes and frees the blocks; only the exporting process should call this.
+        """
+
+        self.close()
+        if self.owner:
+            for block in self.blocks:
+                block.unlink()
+
+
+    def __enter__(self) -> 'SharedGameTable':
+        """
+        Returns the table itself for use in a with statement.
+        """
+
+        return self
+
+
+    def __exit__(self, *exception) -> None:
+        """
+        Frees the blocks when owned, otherwise only closes them.
+        """
+
+        if self.owner:
+            self.unlink()
+        else:
+            self.close()
+
+
+def count_opening_results(handle: dict, start: int, stop: int) -> np.ndarray:
+    """
+    Counts results per opening code for rows [start, stop) of a shared table (worker task).
+
+    Args:
+        handle (dict): The handle of an exported SharedGameTable.
+        start (int): First row.
+        stop (int): Row after the last one.
+
+    Returns:
+        np.ndarray: int64 array (openings, 3) indexed by opening code and result code.
+    """
+
+    with SharedGameTable.attach(handle) as shared:
+        return _count_opening_results(shared.table, start, stop)
+
+
+def _count_opening_results(table: GameTable, start: int, stop: int) -> np.ndarray:
+    """
+    Counts results per opening code for a range of rows.
+
+    Kept separate so the views into shared memory are gone before the blocks are closed.
+    """
+
+    openings = table.columns['opening'][start:stop]
+    results = table.columns['result'][start:stop]
+    number_of_openings = len(table.tables['opening'])
+
+    # Results other than the three RESULTS codes are left out.
+    decided = results < len(RESULTS)
+    keys = openings[decided].astype(np.int64) * len(RESULTS) + results[decided]
+
+    return np.bincount(keys, minlength=number_of_openings * len(RESULTS)).reshape(number_of_openings, len(RESULTS))
+
+
+def parallel_win_loss_by_opening(table: GameTable, workers: int = 2) -> dict:
+    """
+    Computes win_loss_by_opening on a GameTable with worker processes sharing its memory.
+
+    Args:
+        table (GameTable): The encoded games.
+        workers (int): Number of worker processes.
+
+    Returns:
+        dict: {opening_name: (white_wins, black_wins)}
+    """
+
+    with SharedGameTable.export(table) as shared:
+        bounds = np.linspace(0, len(table), workers + 1).astype(int)
+        tasks = [(shared.handle, int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+        with multiprocessing.Pool(workers) as pool:
+            counts = sum(pool.starmap(count_opening_results, tasks))
+
+    # Openings of the table appear in it, so every code is reported (as win_loss_by_opening does).
+    return {
+        name: (int(counts[code, WHITE_WIN]), int(counts[code, BLACK_WIN]))
+        for code, name in enumerate(table.tables['opening'].strings)
+    }
@@ -8,26 +8,219 @@ Author : Szeto Lok
 """
 
 import re
+import sys
+import numpy as np
 import pandas as pd
-import re
+from game_record import *
+from game_table import *
+from time_index import *
+
+
+# Tokens of the move text: comments, variation brackets, NAGs, move numbers
+# ("1." or "1..."), and anything else (moves and results).
+MOVETEXT_TOKEN = re.compile(r'\{[^}]*\}|[()]|\$\d+|\d+\.(?:\.\.)?|[^\s{}()]+')
+
+# Clock and engine evaluation annotations inside comments, e.g. { [%clk 0:10:00] } { [%eval -0.31] }.
+CLOCK_ANNOTATION = re.compile(r'\[%clk\s+(\d+):(\d+):(\d+(?:\.\d+)?)\]')
+EVAL_ANNOTATION = re.compile(r'\[%eval\s+(#?)(-?\d+(?:\.\d+)?)')
+
+# Evaluation (in pawns) stored for a forced mate; the sign gives the side that mates.
+MATE_EVAL = 100.0
+
+
+def split_movetext(moves_str: str) -> tuple[list[str], dict]:
+    """
+    Splits PGN move text into move number and move tokens, leaving out comments,
+    variations, NAGs, black move numbers ("1...") and move suffixes such as "?!".
+
+    Args:
+        moves_str (str): The move text of one game, without the final result.
+
+    Returns:
+        tuple[list[str], dict]: The tokens, and {token index: comment text} for each
+            move token followed by comments.
+    """
+
+    tokens = []
+    comments = {}
+    variation_depth = 0
+
+    for token in MOVETEXT_TOKEN.findall(moves_str):
+
+        # Variations (possibly nested) are alternative lines, not part of the game.
+        if token == '(':
+            variation_depth += 1
+        elif token == ')':
+            variation_depth = max(variation_depth - 1, 0)
+        elif variation_depth > 0:
+            continue
+
+        # A comment belongs to the move before it.
+        elif token[0] == '{':
+            if tokens:
+                comments[len(tokens) - 1] = comments.get(len(tokens) - 1, '') + token
+
+        # NAGs and black move numbers carry no move.
+        elif token[0] == '$' or token.endswith('...'):
+            continue
+
+        # Move quality suffixes ("!", "?!", "??") are not part of the SAN move.
+        else:
+            tokens.append(sys.intern(token.rstrip('!?') or token))
+
+    return tokens, comments
+
+
+def parse_clock(comment: str) -> float:
+    """
+    Returns the clock time in seconds from a comment, or NaN if it has none.
+    """
+
+    match = CLOCK_ANNOTATION.search(comment)
+    if match is None:
+        return np.nan
+
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def parse_eval(comment: str) -> float:
+    """
+    Returns the evaluation in pawns from a comment (+/-MATE_EVAL for a forced mate), or NaN.
+    """
+
+    match = EVAL_ANNOTATION.search(comment)
+    if match is None:
+        return np.nan
+
+    mate, value = match.groups()
+    if mate:
+        return MATE_EVAL if not value.startswith('-') else -MATE_EVAL
+
+    return float(value)
+
+
+def build_game(tags: dict, moves_str: str, extra_tags: tuple[str, ...] = ()) -> tuple[dict, dict]:
+    """
+    Builds the read_pgn dictionary of one game from its tags and move text.
+
+    Args:
+        tags (dict): The game's tags, with lowercase names.
+        moves_str (str): The game's move text on one line.
+        extra_tags (tuple[str, ...]): Additional tags to keep (see read_pgn).
+
+    Returns:
+        tuple[dict, dict]: The game dictionary, and {ply: comment text} for each move
+            slot whose move was followed by a comment (0 = w1, 1 = b1, ...).
+    """
+
+    # These are the tags (metadata) we want to extract from each game.
+    required_tags = ['event', 'white', 'black', 'result', 'whiteelo', 'blackelo', 'opening']
+
+    # Remove any leading/trailing whitespace from the moves string.
+    moves_str = moves_str.strip()
+
+    # Remove the game result (like "1-0", "0-1", "1/2-1/2") from the end if present.
+    moves_str = re.sub(r'\s*(1-0|0-1|1/2-1/2)\s*$', '', moves_str)
+
+    # Split the moves string into individual tokens (numbers and moves), setting
+    # comments aside. Moves repeat across games as much as tags do, so they are interned too.
+    move_tokens, comments = split_movetext(moves_str)
+
+    # Ply (0 = w1, 1 = b1, ...) of each move token placed in a slot.
+    token_plies = {}
+
+    # --- Prepare the output dictionary for this game ---
+
+    # This will store all info for this game.
+    game_dict = {}  
+
+    # Add all required tags to the game dictionary.
+    # If a tag is missing, use '?' as a placeholder.
+    for tag in required_tags:
+        game_dict[tag] = tags.get(tag, '?')
+
+    # Additional tags are only added when asked for, so the default output keeps 47 keys.
+    for tag in extra_tags:
+        game_dict[tag] = tags.get(tag, '?')
+
+    # Initialize all move slots for 20 rounds (w1, b1, ..., w20, b20) to '-'
+    for round_number in range(1, 21):
+        game_dict[f'w{round_number}'] = '-'
+        game_dict[f'b{round_number}'] = '-'
+
+    # --- Extract moves into w1, b1, ..., w20, b20 ---
+
+    # This keeps track of which round we're on (1-based).
+    current_round = 1  
 
+    # This keeps track of our position in move_tokens.
+    move_token_index = 0 
 
-def read_pgn(file_name: str) -> list[dict]:
+    # Process up to 20 rounds of moves (white and black).
+    while move_token_index < len(move_tokens) and current_round <= 20:
+
+        # Look for a move number token (like "1.")
+        if re.match(r'^\d+\.$', move_tokens[move_token_index]):
+
+            # Skip the move number token.
+            move_token_index += 1 
+
+            # If the next token is a move (not another number), assign to white.
+            if move_token_index < len(move_tokens) and not re.match(r'^\d+\.$', move_tokens[move_token_index]):
+                game_dict[f'w{current_round}'] = move_tokens[move_token_index]
+                token_plies[move_token_index] = 2 * (current_round - 1)
+                move_token_index += 1
+
+            # If the next token is a move (not another number), assign to black.
+            if move_token_index < len(move_tokens) and not re.match(r'^\d+\.$', move_tokens[move_token_index]):
+                game_dict[f'b{current_round}'] = move_tokens[move_token_index]
+                token_plies[move_token_index] = 2 * (current_round - 1) + 1
+                move_token_index += 1
+
+            # Move to the next round.
+            current_round += 1
+
+        else:
+
+            # If the token is not a move number, skip it (defensive programming).
+            move_token_index += 1
+
+    # Key the comments by the slot their move landed in.
+    ply_comments = {token_plies[token_index]: comment
+                    for token_index, comment in comments.items() if token_index in token_plies}
+
+    return game_dict, ply_comments
+
+
+def read_pgn(file_name: str, compact: bool = False, extra_tags: tuple[str, ...] = (),
+             annotations: bool = False) -> list[dict]:
     """
     Reads a PGN file and returns a list of dictionaries representing games.
     Each dictionary contains 7 tags and up to 20 moves for white and black.
 
+    Comments, variations and NAGs are skipped, so the move slots only hold SAN moves.
+
     Args:
         file_name (str): Path to the PGN file.
+        compact (bool): If True, return slotted Game records (see game_record.py)
+            instead of dictionaries. They support the same key access.
+        extra_tags (tuple[str, ...]): Additional lowercase tags to keep, e.g. ('eco',).
+            By default only the 7 tags of part1.txt are kept.
+        annotations (bool): If True, also return the [%clk] and [%eval] comment values.
 
     Returns:
         list[dict]: List of game dictionaries with keys as specified in part1.txt.
+            With annotations=True, a tuple (games, clocks, evals) where clocks (seconds
+            left) and evals (pawns) are float32 arrays of shape (games, 40), one column
+            per move slot, NaN where the move has no such annotation.
     """
 
     games = []  # This will hold all parsed games as dictionaries.
 
-    # These are the tags (metadata) we want to extract from each game.
-    required_tags = ['event', 'white', 'black', 'result', 'whiteelo', 'blackelo', 'opening']
+    # Per-game rows of clock and eval values (only filled when annotations are requested).
+    clock_rows = []
+    eval_rows = []
 
     # Open the PGN file for reading.
     with open(file_name, 'r', encoding='utf-8') as file:
@@ -69,7 +262,8 @@ def read_pgn(file_name: str) -> list[dict]:
                 tag, value = match.groups() 
                 
                 # Store the tag in lowercase for consistency.
-                tags[tag.lower()] = value    
+                # Interning makes repeated values (openings, events, names) share one string.
+                tags[tag.lower()] = sys.intern(value)
 
             # Move to the next line.
             current_line_index += 1  
@@ -90,84 +284,138 @@ def read_pgn(file_name: str) -> list[dict]:
             moves_str += ' ' + lines[current_line_index].strip()
             current_line_index += 1
 
-        # Remove any leading/trailing whitespace from the moves string.
-        moves_str = moves_str.strip()
+        # Turn the tags and move text into the game dictionary.
+        game_dict, ply_comments = build_game(tags, moves_str, extra_tags)
 
-        # Remove the game result (like "1-0", "0-1", "1/2-1/2") from the end if present.
-        moves_str = re.sub(r'\s*(1-0|0-1|1/2-1/2)\s*$', '', moves_str)
+        # Add the fully parsed game to the list of games.
+        # In compact mode the 47-key dictionary is replaced by a slotted record.
+        if compact:
+            games.append(Game.from_dict(game_dict, extra_tags))
+        else:
+            games.append(game_dict)
 
-        # Split the moves string into individual tokens (numbers and moves).
-        move_tokens = moves_str.split()
+        # Put the clock and eval of each commented move in its ply's column.
+        if annotations:
+            clock_row = [np.nan] * len(MOVE_KEYS)
+            eval_row = [np.nan] * len(MOVE_KEYS)
 
-        # --- Prepare the output dictionary for this game ---
+            for ply, comment in ply_comments.items():
+                clock_row[ply] = parse_clock(comment)
+                eval_row[ply] = parse_eval(comment)
 
-        # This will store all info for this game.
-        game_dict = {}  
+            clock_rows.append(clock_row)
+            eval_rows.append(eval_row)
 
-        # Add all required tags to the game dictionary.
-        # If a tag is missing, use '?' as a placeholder.
-        for tag in required_tags:
-            game_dict[tag] = tags.get(tag, '?')
+    # Once all games are processed, return the list of game dictionaries.
+    if annotations:
+        shape = (len(games), len(MOVE_KEYS))
+        clocks = np.array(clock_rows, dtype=np.float32).reshape(shape)
+        evals = np.array(eval_rows, dtype=np.float32).reshape(shape)
+        return games, clocks, evals
+
+    return games
 
-        # Initialize all move slots for 20 rounds (w1, b1, ..., w20, b20) to '-'
-        for round_number in range(1, 21):
-            game_dict[f'w{round_number}'] = '-'
-            game_dict[f'b{round_number}'] = '-'
 
-        # --- Extract moves into w1, b1, ..., w20, b20 ---
+def read_headers(file_name: str, tags: tuple[str, ...] = ('result', 'opening', 'whiteelo', 'blackelo')) -> list[dict]:
+    """
+    Quickly reads only the tag section of every game in a PGN file.
+    Move lines are skipped without being joined or split into tokens, so the
+    result can be passed straight to win_loss_by_opening or win_loss_by_elo.
 
-        # This keeps track of which round we're on (1-based).
-        current_round = 1  
+    Args:
+        file_name (str): Path to the PGN file.
+        tags (tuple[str, ...]): Lowercase tag names to keep for each game.
 
-        # This keeps track of our position in move_tokens.
-        move_token_index = 0 
+    Returns:
+        list[dict]: One dictionary per game with the requested tags
+            ('?' for any tag that is missing from a game).
+    """
 
-        # Process up to 20 rounds of moves (white and black).
-        while move_token_index < len(move_tokens) and current_round <= 20:
+    games = []  # This will hold the header dictionaries of all games.
 
-            # Look for a move number token (like "1.")
-            if re.match(r'^\d+\.$', move_tokens[move_token_index]):
+    # Encode the wanted tag names once so header lines can be compared as bytes.
+    wanted_tags = {tag.encode('ascii'): tag for tag in tags}
 
-                # Skip the move number token.
-                move_token_index += 1 
+    # The tags of the game currently being read, or None between games.
+    current_tags = None
 
-                # If the next token is a move (not another number), assign to white.
-                if move_token_index < len(move_tokens) and not re.match(r'^\d+\.$', move_tokens[move_token_index]):
-                    game_dict[f'w{current_round}'] = move_tokens[move_token_index]
-                    move_token_index += 1
+    # Read in binary mode: only the tag values we keep are ever decoded.
+    with open(file_name, 'rb') as file:
+        for line in file:
 
-                # If the next token is a move (not another number), assign to black.
-                if move_token_index < len(move_tokens) and not re.match(r'^\d+\.$', move_tokens[move_token_index]):
-                    game_dict[f'b{current_round}'] = move_tokens[move_token_index]
-                    move_token_index += 1
+            # Any line that does not start with '[' is either blank or move text.
+            # It closes the tag section of the current game (if one is open).
+            if line[:1] != b'[':
+                if current_tags is not None:
+                    games.append(current_tags)
+                    current_tags = None
+                continue
 
-                # Move to the next round.
-                current_round += 1
+            # A tag line outside a tag section starts a new game.
+            if current_tags is None:
+                current_tags = dict.fromkeys(tags, '?')
 
-            else:
+            # Split [TagName "Value"] on the first space without using a regex.
+            space_index = line.find(b' ')
+            tag = wanted_tags.get(line[1:space_index].lower())
 
-                # If the token is not a move number, skip it (defensive programming).
-                move_token_index += 1
+            if tag is not None:
+                # The value sits between the first and the last double quote.
+                value_start = line.find(b'"', space_index) + 1
+                value_end = line.rfind(b'"')
+                if 0 < value_start <= value_end:
+                    current_tags[tag] = sys.intern(line[value_start:value_end].decode('utf-8'))
 
-        # Add the fully parsed game dictionary to the list of games.
-        games.append(game_dict)
+    # A file may end straight after a tag section with no move text.
+    if current_tags is not None:
+        games.append(current_tags)
 
-    # Once all games are processed, return the list of game dictionaries.
     return games
 
 
+def read_game_table(file_name: str, extra_tags: tuple[str, ...] = ()) -> GameTable:
+    """
+    Reads a PGN file into a dictionary-encoded GameTable (see game_table.py).
+
+    Args:
+        file_name (str): Path to the PGN file.
+        extra_tags (tuple[str, ...]): Additional tags to encode as columns, e.g. ('eco',).
+
+    Returns:
+        GameTable: The games of the file, one row per game.
+    """
+
+    games = read_pgn(file_name, compact=True, extra_tags=extra_tags)
+
+    return GameTable.from_games(games, GAME_TAGS + tuple(extra_tags))
+
+
 # Part 2
-def win_loss_by_opening(games: list[dict]) -> dict:
+def win_loss_by_opening(games: list[dict], start: int = None, end: int = None) -> dict:
     """
     Analyzes chess games to count white/black wins per opening using pandas.
     
     Args:
-        games (list[dict]): List of game dictionaries from read_pgn()
+        games (list[dict]): List of game dictionaries from read_pgn(), a TimeIndex,
+            or a GameTable, in which case openings are grouped on their integer codes.
+        start (int): Only count games played at or after this timestamp (see time_index.py).
+        end (int): Only count games played before this timestamp.
         
     Returns:
         dict: {opening_name: (white_wins, black_wins)}
     """
 
+    # Encoded table: count wins per opening code instead of hashing opening names.
+    if isinstance(games, GameTable):
+        if start is not None or end is not None:
+            raise ValueError("Time ranges need a list of games or a TimeIndex, not a GameTable")
+        return _win_loss_by_opening_codes(games)
+
+    # Keep only the games in the time range (binary search on a TimeIndex).
+    games = select_time_range(games, start, end)
+    if not games:
+        return {}
+
     # Convert list of game dictionaries to pandas DataFrame
     df = pd.DataFrame(games)
 
@@ -201,21 +449,56 @@ def win_loss_by_opening(games: list[dict]) -> dict:
     return result
 
 
+def _win_loss_by_opening_codes(table: GameTable) -> dict:
+    """
+    Counts white/black wins per opening on a GameTable using integer opening codes.
+
+    Args:
+        table (GameTable): The encoded games.
+
+    Returns:
+        dict: {opening_name: (white_wins, black_wins)}
+    """
+
+    openings = table.columns['opening']
+    results = table.columns['result']
+    number_of_openings = len(table.tables['opening'])
+
+    # One bincount per result gives the win count of every opening code at once.
+    white_wins = np.bincount(openings[results == WHITE_WIN], minlength=number_of_openings)
+    black_wins = np.bincount(openings[results == BLACK_WIN], minlength=number_of_openings)
+
+    # Only report openings that actually appear in the table.
+    present = np.bincount(openings, minlength=number_of_openings) > 0
+
+    return {
+        table.decode('opening', code): (int(white_wins[code]), int(black_wins[code]))
+        for code in np.flatnonzero(present)
+    }
+
+
 #Part 3
-def win_loss_by_elo(games: list[dict], lower: int, upper: int) -> tuple[int, int]:
+def win_loss_by_elo(games: list[dict], lower: int, upper: int, start: int = None, end: int = None) -> tuple[int, int]:
     """
     Uses pandas to count wins by lower and higher ELO players in games where the
     absolute ELO difference is in (lower, upper).
 
     Args:
-        games (list[dict]): List of game dicts from read_pgn.
+        games (list[dict]): List of game dicts from read_pgn, or a TimeIndex.
         lower (int): Lower bound (exclusive) for ELO difference.
         upper (int): Upper bound (exclusive) for ELO difference.
+        start (int): Only count games played at or after this timestamp (see time_index.py).
+        end (int): Only count games played before this timestamp.
 
     Returns:
         tuple: (lower_elo_wins, higher_elo_wins)
     """
 
+    # Keep only the games in the time range (binary search on a TimeIndex).
+    games = select_time_range(games, start, end)
+    if not games:
+        return 0, 0
+
     # Convert list of game dictionaries to pandas DataFrame for efficient processing
     df = pd.DataFrame(games)
 
@@ -259,13 +542,15 @@ def win_loss_by_elo(games: list[dict], lower: int, upper: int) -> tuple[int, int
 
 
 #Part 4
-def win_loss_by_moves(games: list[dict], moves: list[str]) -> tuple[int, int]:
+def win_loss_by_moves(games: list[dict], moves: list[str], start: int = None, end: int = None) -> tuple[int, int]:
     """
     Counts the number of games won by white and black for games that start with the given sequence of moves.
 
     Args:
-        games (list[dict]): List of game dictionaries as produced by read_pgn.
+        games (list[dict]): List of game dictionaries as produced by read_pgn, or a TimeIndex.
         moves (list[str]): List of moves (alternating white/black) to match at the start of each game.
+        start (int): Only count games played at or after this timestamp (see time_index.py).
+        end (int): Only count games played before this timestamp.
 
     Returns:
         tuple[int, int]: (white_win_count, black_win_count)
@@ -273,6 +558,11 @@ def win_loss_by_moves(games: list[dict], moves: list[str]) -> tuple[int, int]:
             - black_win_count: Number of games won by black.
     """
 
+    # Keep only the games in the time range (binary search on a TimeIndex).
+    games = select_time_range(games, start, end)
+    if not games:
+        return 0, 0
+
     # Convert the list of game dictionaries to a pandas DataFrame
     # This allows efficient column-wise operations and filtering
     df = pd.DataFrame(games)
@@ -0,0 +1,942 @@
+import os
+import tempfile
+import threading
+import unittest
+from task6 import *
+from generate_pgn import *
+from benchmark_analytics import *
+from sampling import *
+from opening_explorer import *
+from position_index import *
+from result_cube import *
+from eco import *
+from player_index import *
+from ingest import *
+from shared_table import *
+from query import *
+from follow import *
+
+
+DATA_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+LICHESS_SMALL = os.path.join(DATA_DIRECTORY, 'lichess_small.pgn')
+EXAMPLE = os.path.join(DATA_DIRECTORY, 'example.pgn')
+OWN_EXAMPLE = os.path.join(DATA_DIRECTORY, 'own_example.pgn')
+
+
+class TestReadHeaders(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Parse the small Lichess sample once with the full parser for comparison.
+        """
+
+        self.games = read_pgn(LICHESS_SMALL)
+
+
+    def test_headers_match_full_parse(self):
+        """
+        Test that read_headers returns the same tag values as read_pgn for every game.
+        """
+
+        headers = read_headers(LICHESS_SMALL)
+        expected = [{tag: game[tag] for tag in ('result', 'opening', 'whiteelo', 'blackelo')} for game in self.games]
+
+        self.assertEqual(len(headers), len(self.games), f"Expected {len(self.games)} games, got {len(headers)}")
+        self.assertEqual(headers, expected, "Expected header values to match read_pgn")
+
+
+    def test_headers_feed_analysis_functions(self):
+        """
+        Test that win_loss_by_opening and win_loss_by_elo give identical results on the header-only scan.
+        """
+
+        headers = read_headers(EXAMPLE)
+        games = read_pgn(EXAMPLE)
+
+        self.assertEqual(win_loss_by_opening(headers), win_loss_by_opening(games))
+        self.assertEqual(win_loss_by_elo(headers, 0, 600), win_loss_by_elo(games, 0, 600))
+
+
+    def test_missing_tags_use_placeholder(self):
+        """
+        Test that requested tags absent from a game are reported as '?'.
+        """
+
+        headers = read_headers(EXAMPLE, ('result', 'eventdate'))
+
+        self.assertTrue(all(game['eventdate'] == '?' for game in headers), "Expected '?' for a missing tag")
+
+
+class TestCompactGame(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Parse the small Lichess sample as dictionaries and as compact records.
+        """
+
+        self.games = read_pgn(LICHESS_SMALL)
+        self.compact_games = read_pgn(LICHESS_SMALL, compact=True)
+
+
+    def test_compact_games_equal_dictionaries(self):
+        """
+        Test that every Game compares equal to its dictionary and exposes the same keys.
+        """
+
+        self.assertEqual(self.compact_games, self.games, "Expected compact games to equal the dictionaries")
+        self.assertEqual(list(self.compact_games[0].keys()), list(self.games[0].keys()))
+        self.assertEqual(self.compact_games[0]['b20'], self.games[0]['b20'])
+
+
+    def test_compact_games_feed_analysis_functions(self):
+        """
+        Test that the analysis functions give identical results on compact games.
+        """
+
+        self.assertEqual(win_loss_by_opening(self.compact_games), win_loss_by_opening(self.games))
+        self.assertEqual(win_loss_by_elo(self.compact_games, 0, 200), win_loss_by_elo(self.games, 0, 200))
+        self.assertEqual(win_loss_by_moves(self.compact_games, ['e4', 'e5', 'Nf3']), win_loss_by_moves(self.games, ['e4', 'e5', 'Nf3']))
+
+
+    def test_game_uses_slots(self):
+        """
+        Test that a Game has no per-instance dictionary and rejects unknown keys.
+        """
+
+        game = self.compact_games[0]
+
+        self.assertFalse(hasattr(game, '__dict__'), "Expected Game to be slotted")
+        with self.assertRaises(KeyError):
+            game['eco']
+
+
+class TestGameTable(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Parse the small Lichess sample as dictionaries and as an encoded table.
+        """
+
+        self.games = read_pgn(LICHESS_SMALL)
+        self.table = read_game_table(LICHESS_SMALL)
+
+
+    def test_codes_decode_to_original_values(self):
+        """
+        Test that every tag and move code decodes back to the parsed string.
+        """
+
+        for row in (0, len(self.games) // 2, len(self.games) - 1):
+            game = self.games[row]
+
+            for tag in GAME_TAGS:
+                self.assertEqual(self.table.decode(tag, self.table.columns[tag][row]), game[tag])
+
+            decoded_moves = [self.table.move_table.decode(code) for code in self.table.moves[row]]
+            self.assertEqual(decoded_moves, [game[key] for key in MOVE_KEYS])
+
+
+    def test_repeated_strings_are_stored_once(self):
+        """
+        Test that repeated tag values share one code and one interned string.
+        """
+
+        self.assertLess(len(self.table.tables['opening']), len(self.games), "Expected openings to repeat")
+        self.assertEqual(self.table.decode('result', WHITE_WIN), '1-0')
+        self.assertIs(self.games[0]['event'], self.games[1]['event'], "Expected interned event strings")
+
+
+    def test_win_loss_by_opening_on_codes(self):
+        """
+        Test that grouping on opening codes gives the same result as grouping on names.
+        """
+
+        self.assertEqual(win_loss_by_opening(self.table), win_loss_by_opening(self.games))
+
+
+class TestSyntheticCorpus(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Create a temporary folder for generated corpora.
+        """
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, 'synthetic.pgn')
+
+
+    def tearDown(self):
+        """
+        Remove the generated corpora.
+        """
+
+        self.directory.cleanup()
+
+
+    def test_generated_games_are_legal_and_reproducible(self):
+        """
+        Test that the generator writes the requested number of parsable games with legal moves.
+        """
+
+        write_pgn(self.file_name, 50, seed=3, pool_size=5, max_plies=12)
+        games = read_pgn(self.file_name)
+
+        self.assertEqual(len(games), 50, f"Expected 50 games, got {len(games)}")
+
+        for game in games[:5]:
+            moves = [game[key] for key in MOVE_KEYS if game[key] != '-']
+            for ply, move in enumerate(moves):
+                self.assertIn(move, possible_moves(moves[:ply]), f"Illegal move {move} at ply {ply}")
+
+        second_file = os.path.join(self.directory.name, 'again.pgn')
+        write_pgn(second_file, 50, seed=3, pool_size=5, max_plies=12)
+        self.assertEqual(read_pgn(second_file), games, "Expected the same seed to give the same corpus")
+
+
+    def test_benchmark_reports_curves(self):
+        """
+        Test that the benchmark runner reports one throughput point per size and function.
+        """
+
+        write_pgn(os.path.join(self.directory.name, 'synthetic_30_0.pgn'), 30, pool_size=3, max_plies=10)
+        write_pgn(os.path.join(self.directory.name, 'synthetic_60_0.pgn'), 60, pool_size=3, max_plies=10)
+
+        report = run_benchmark([30, 60], ['read_pgn', 'win_loss_by_opening'], self.directory.name)
+
+        self.assertEqual([point['games'] for point in report['curves']['read_pgn']], [30, 60])
+        self.assertEqual(len(report['curves']['win_loss_by_opening']), 2)
+
+
+    def test_benchmark_loads_winning_statistics_from_task7(self):
+        """
+        Test that task7.py and the modules it imports load from the Q6 folder.
+        """
+
+        write_pgn(os.path.join(self.directory.name, 'synthetic_30_0.pgn'), 30, pool_size=3, max_plies=10)
+
+        self.assertIsNotNone(load_winning_statistics(), "Expected ../Q7/task7.py to be found")
+
+        report = run_benchmark([30], ['winning_statistics'], self.directory.name)
+        self.assertEqual(len(report['curves']['winning_statistics']), 1)
+
+
+    def test_corpus_name_depends_on_seed_and_sample_source(self):
+        """
+        Test that a different seed or sample source never reuses an existing corpus.
+        """
+
+        names = {corpus_file_name(100, 0), corpus_file_name(100, 1), corpus_file_name(100, 0, LICHESS_SMALL),
+                 corpus_file_name(100, 0, EXAMPLE)}
+
+        self.assertEqual(len(names), 4)
+        self.assertEqual(corpus_file_name(100, 0, LICHESS_SMALL), corpus_file_name(100, 0, LICHESS_SMALL))
+
+
+class TestSampling(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Generate a synthetic corpus large enough for sampling to be worthwhile.
+        """
+
+        self.directory = tempfile.TemporaryDirectory()
+        file_name = os.path.join(self.directory.name, 'sample.pgn')
+        write_pgn(file_name, 4000, seed=1, pool_size=4, max_plies=8)
+        self.games = read_pgn(file_name)
+
+
+    def tearDown(self):
+        """
+        Remove the generated corpus.
+        """
+
+        self.directory.cleanup()
+
+
+    def test_sample_is_reproducible(self):
+        """
+        Test that the same seed always draws the same sample and that it keeps the requested share.
+        """
+
+        sample = sample_games(self.games, 0.05, seed=7)
+
+        self.assertEqual(len(sample), 200)
+        self.assertEqual(sample, sample_games(self.games, 0.05, seed=7))
+        self.assertNotEqual(sample, sample_games(self.games, 0.05, seed=8))
+
+
+    def test_intervals_cover_exact_counts(self):
+        """
+        Test that sampled estimates come with intervals containing the exact counts.
+        """
+
+        exact = win_loss_by_opening(self.games)
+        estimates = approximate_win_loss_by_opening(self.games, fraction=0.1, max_relative_error=1.0)
+
+        self.assertTrue(any(not white_wins.exact for white_wins, _ in estimates.values()), "Expected some sampled estimates")
+        for opening, (white_wins, black_wins) in estimates.items():
+            self.assertLessEqual(white_wins.low, exact[opening][0])
+            self.assertGreaterEqual(white_wins.high, exact[opening][0])
+            self.assertLessEqual(black_wins.low, exact[opening][1])
+            self.assertGreaterEqual(black_wins.high, exact[opening][1])
+
+
+    def test_wide_intervals_fall_back_to_exact(self):
+        """
+        Test that a tiny sample with a strict error limit returns the exact answers.
+        """
+
+        moves = [self.games[0]['w1']]
+        exact_opening = win_loss_by_opening(self.games)
+
+        for opening, (white_wins, black_wins) in approximate_win_loss_by_opening(self.games, 0.001, max_relative_error=0.01).items():
+            self.assertTrue(white_wins.exact and black_wins.exact)
+            self.assertEqual((white_wins.value, black_wins.value), exact_opening[opening])
+
+        elo_result = approximate_win_loss_by_elo(self.games, 0, 100, 0.001, max_relative_error=0.01)
+        self.assertEqual(tuple(estimate.value for estimate in elo_result), win_loss_by_elo(self.games, 0, 100))
+
+        moves_result = approximate_win_loss_by_moves(self.games, moves, 0.001, max_relative_error=0.01)
+        self.assertEqual(tuple(estimate.value for estimate in moves_result), win_loss_by_moves(self.games, moves))
+        self.assertTrue(all(estimate.exact for estimate in moves_result))
+
+
+    def test_unsampled_openings_are_counted_exactly(self):
+        """
+        Test that an opening missing from the sample still appears, with its exact counts.
+        """
+
+        games = self.games + [dict(self.games[0], opening='Rare Gambit', result='1-0')]
+        self.assertNotIn('Rare Gambit', {game['opening'] for game in sample_games(games, 0.01)})
+
+        estimates = approximate_win_loss_by_opening(games, 0.01)
+
+        self.assertEqual(estimates.keys(), win_loss_by_opening(games).keys())
+        white_wins, black_wins = estimates['Rare Gambit']
+        self.assertTrue(white_wins.exact and black_wins.exact)
+        self.assertEqual((white_wins.value, black_wins.value), (1, 0))
+
+
+class TestOpeningExplorer(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Build an explorer over the small Lichess sample.
+        """
+
+        self.games = read_pgn(LICHESS_SMALL)
+        self.explorer = OpeningExplorer(GameTable.from_games(self.games), cache_size=2)
+
+
+    def test_matches_win_loss_by_moves(self):
+        """
+        Test that every listed next move has the counts win_loss_by_moves gives for the extended line.
+        """
+
+        for prefix in ([], ['e4'], ['d4', 'd5']):
+            stats = self.explorer.next_move_stats(prefix)
+            totals = [entry[0] for entry in stats.values()]
+
+            self.assertEqual(totals, sorted(totals, reverse=True), "Expected the most played moves first")
+            for move, (games, white_wins, draws, black_wins) in stats.items():
+                self.assertEqual(win_loss_by_moves(self.games, prefix + [move]), (white_wins, black_wins))
+                self.assertLessEqual(white_wins + draws + black_wins, games)
+
+        self.assertEqual(sum(entry[0] for entry in self.explorer.next_move_stats([]).values()), len(self.games))
+        self.assertEqual(self.explorer.next_move_stats(['e4', 'Qh4']), {})
+
+
+    def test_cache_is_least_recently_used(self):
+        """
+        Test that repeated prefixes are served from the cache and the oldest prefix is evicted.
+        """
+
+        first = self.explorer.next_move_stats(['e4'])
+        self.assertEqual(self.explorer.misses, 2, "Expected the prefix and its parent to be computed")
+
+        self.assertIs(self.explorer.next_move_stats(['e4']), first)
+        self.assertEqual(self.explorer.hits, 1)
+
+        # ['d4'] reuses the empty prefix, so ['e4'] is now the least recently used
+        self.explorer.next_move_stats(['d4'])
+        self.assertEqual(list(self.explorer.cache), [(), ('d4',)])
+
+
+class TestPositionIndex(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Index the first plies of the small Lichess sample.
+        """
+
+        self.games = read_pgn(LICHESS_SMALL)
+        self.index = PositionIndex.build(self.games, plies=8)
+
+
+    def test_transpositions_are_merged(self):
+        """
+        Test that both move orders reach the same position and count the games of both.
+        """
+
+        first_order = ['d4', 'Nf6', 'c4']
+        second_order = ['c4', 'Nf6', 'd4']
+        white_wins = win_loss_by_moves(self.games, first_order)[0] + win_loss_by_moves(self.games, second_order)[0]
+
+        self.assertEqual(self.index.stats(first_order), self.index.stats(second_order))
+        self.assertEqual(self.index.stats(first_order)[1], white_wins)
+
+
+    def test_fen_query_and_parallel_build(self):
+        """
+        Test that the start position counts every game and that worker processes build the same index.
+        """
+
+        games, white_wins, draws, black_wins = self.index.stats(chess.STARTING_FEN)
+
+        self.assertEqual(games, len(self.games))
+        self.assertEqual((white_wins, black_wins), tuple(map(sum, zip(*win_loss_by_opening(self.games).values()))))
+        self.assertEqual(PositionIndex.build(self.games, plies=8, workers=2).counts, self.index.counts)
+
+
+class TestResultCube(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Build the cube of the small Lichess sample.
+        """
+
+        self.games = read_pgn(LICHESS_SMALL)
+        self.cube = ResultCube.from_table(GameTable.from_games(self.games))
+
+
+    def test_roll_up_matches_win_loss_by_opening(self):
+        """
+        Test that the full roll-up and a rating slice match win_loss_by_opening on the matching games.
+        """
+
+        self.assertEqual(self.cube.win_loss_by_opening(), win_loss_by_opening(self.games))
+
+        def in_range(elo, low, high):
+            return elo.isdigit() and low <= int(elo) < high
+
+        rated = [game for game in self.games if in_range(game['whiteelo'], 1800, 2200) and in_range(game['blackelo'], 0, 2000)]
+        self.assertEqual(self.cube.win_loss_by_opening((1800, 2200), (0, 2000)), win_loss_by_opening(rated))
+
+        # Part of a bucket cannot be answered from the cube.
+        with self.assertRaises(ValueError):
+            self.cube.slice(white_elo=(1510, 1590))
+
+
+    def test_ratings_above_max_elo_have_their_own_bucket(self):
+        """
+        Test that a 3150 rating is counted from 3000 up and not in 2900-2999.
+        """
+
+        cube = ResultCube()
+        cube.add_game(dict(self.games[0], opening='X', whiteelo='3150', result='1-0'))
+
+        self.assertEqual(cube.win_loss_by_opening(white_elo=(2900, 3000)), {})
+        self.assertEqual(cube.win_loss_by_opening(white_elo=(3000, 3200)), {'X': (1, 0)})
+        self.assertEqual(cube.win_loss_by_opening(white_elo=(0, 4000)), {'X': (1, 0)})
+        self.assertEqual(cube.win_loss_by_opening(), {'X': (1, 0)})
+
+        with self.assertRaises(ValueError):
+            cube.slice(white_elo=(3100, 3200))
+
+
+    def test_streaming_build_matches_table_build(self):
+        """
+        Test that adding games one at a time gives the same cube as building it from a table.
+        """
+
+        streamed = ResultCube()
+        for game in self.games:
+            streamed.add_game(game)
+
+        self.assertEqual(streamed.win_loss_by_opening(), self.cube.win_loss_by_opening())
+        self.assertEqual(int(streamed.slice().sum()), int(self.cube.slice().sum()))
+
+
+class TestEco(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Parse the small Lichess sample with the ECO tag.
+        """
+
+        self.games = read_pgn(LICHESS_SMALL, extra_tags=('eco',))
+
+
+    def test_eco_is_only_kept_on_request(self):
+        """
+        Test that the default output keeps 47 keys and the ECO tag is extracted when asked for.
+        """
+
+        self.assertEqual(len(read_pgn(LICHESS_SMALL)[0]), 47)
+        self.assertEqual(len(self.games[0]), 48)
+        self.assertEqual(read_pgn(LICHESS_SMALL, compact=True, extra_tags=('eco',)), self.games)
+        self.assertEqual((eco_code('C42'), eco_name(242), eco_code('?')), (242, 'C42', MISSING_ECO))
+
+
+    def test_levels_roll_up(self):
+        """
+        Test that codes sum to their groups and groups to their families, for lists and tables alike.
+        """
+
+        statistics = win_loss_by_eco(self.games)
+        table = GameTable.from_games(self.games, GAME_TAGS + ('eco',))
+
+        self.assertEqual(win_loss_by_eco(table), statistics)
+
+        white_wins = sum(1 for game in self.games if game['eco'].startswith('C') and game['result'] == '1-0')
+        self.assertEqual(statistics['family']['C'][0], white_wins)
+
+        for level, parent_level, prefix_length in (('code', 'group', 2), ('group', 'family', 1)):
+            for parent, (parent_white, parent_black) in statistics[parent_level].items():
+                children = [counts for name, counts in statistics[level].items() if name[:prefix_length] == parent[:prefix_length]]
+                self.assertEqual((sum(white for white, _ in children), sum(black for _, black in children)), (parent_white, parent_black))
+
+
+class TestTimeIndex(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Index the small Lichess sample, which spans 2012.12.31 and 2013.01.01, by time.
+        """
+
+        self.games = read_pgn(LICHESS_SMALL, extra_tags=TIME_TAGS)
+        self.index = TimeIndex(self.games)
+        self.new_year = timestamp('2013.01.01')
+
+
+    def test_between_uses_half_open_ranges(self):
+        """
+        Test that a range split at midnight covers every game exactly once.
+        """
+
+        before = self.index.between(end=self.new_year)
+        after = self.index.between(start=self.new_year)
+
+        self.assertEqual(len(before) + len(after), len(self.games))
+        self.assertTrue(all(game['utcdate'] == '2012.12.31' for game in before))
+        self.assertTrue(all(game['utcdate'] == '2013.01.01' for game in after))
+        self.assertEqual(timestamp('2013.01.01', '00:00:01') - self.new_year, 1)
+
+
+    def test_impossible_dates_are_missing(self):
+        """
+        Test that numeric but impossible dates give MISSING_TIMESTAMP instead of raising.
+        """
+
+        for date in ('2013.13.01', '2013.02.30', '????.??.??'):
+            self.assertEqual(timestamp(date), MISSING_TIMESTAMP)
+
+        self.assertEqual(timestamp('2013.01.01', '25:00:00'), self.new_year)
+
+
+    def test_analysis_functions_accept_ranges(self):
+        """
+        Test that ranged queries on the index match filtering the plain list, and empty ranges give zeros.
+        """
+
+        hour = (self.new_year, self.new_year + 3600)
+
+        self.assertEqual(win_loss_by_opening(self.index, *hour), win_loss_by_opening(self.games, *hour))
+        self.assertEqual(win_loss_by_elo(self.index, 0, 100, *hour), win_loss_by_elo(self.games, 0, 100, *hour))
+        self.assertEqual(win_loss_by_moves(self.index, ['e4'], *hour), win_loss_by_moves(self.games, ['e4'], *hour))
+        self.assertEqual(win_loss_by_opening(self.index), win_loss_by_opening(self.games))
+        self.assertEqual(win_loss_by_moves(self.index, ['e4'], 0, 1), (0, 0))
+
+
+class TestPlayerIndex(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Index the players of the small Lichess sample.
+        """
+
+        self.games = read_pgn(LICHESS_SMALL)
+        self.index = PlayerIndex(GameTable.from_games(self.games))
+
+
+    def test_rows_match_a_full_scan(self):
+        """
+        Test that the CSR rows of every player are exactly the games a scan of both colours finds.
+        """
+
+        for name in ('t4nk', self.games[0]['white'], self.games[-1]['black']):
+            expected = [row for row, game in enumerate(self.games) if name in (game['white'], game['black'])]
+            self.assertEqual(self.index.rows(name).tolist(), expected)
+
+        self.assertEqual(int(self.index.offsets[-1]), 2 * len(self.games))
+
+
+    def test_games_against_oneself_count_once(self):
+        """
+        Test that a game with the same white and black name is one game of that player.
+        """
+
+        games = self.games + [dict(self.games[0], white='mirror', black='mirror', result='1-0')]
+        index = PlayerIndex(GameTable.from_games(games))
+
+        self.assertEqual(index.rows('mirror').tolist(), [len(self.games)])
+        self.assertEqual(index.player_stats('mirror')['games'], 1)
+
+
+    def test_player_stats(self):
+        """
+        Test the results, rating trend and favourite openings of one player.
+        """
+
+        games = [game for game in self.games if 't4nk' in (game['white'], game['black'])]
+        wins = sum(1 for game in games if game['result'] == ('1-0' if game['white'] == 't4nk' else '0-1'))
+        stats = self.index.player_stats('t4nk')
+
+        self.assertEqual((stats['games'], stats['wins']), (len(games), wins))
+        self.assertEqual(stats['wins'] + stats['losses'] + stats['draws'], len(games))
+        self.assertEqual(stats['rating_trend'][0], int(games[0]['whiteelo' if games[0]['white'] == 't4nk' else 'blackelo']))
+        self.assertEqual(len(stats['favourite_openings']), FAVOURITE_OPENINGS)
+        self.assertEqual(self.index.player_stats('nobody')['games'], 0)
+
+
+class TestQuery(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Build a database over the small Lichess sample, keeping the time headers.
+        """
+
+        self.games = read_pgn(LICHESS_SMALL, extra_tags=TIME_TAGS)
+        self.database = GameDatabase(GameTable.from_games(self.games, GAME_TAGS + TIME_TAGS))
+
+
+    def test_grouped_wins_match_win_loss_by_opening(self):
+        """
+        Test a combined Elo difference and prefix query against filtering the games by hand.
+        """
+
+        result = query(self.database).where(elo_diff=(0, 200), prefix=['e4', 'e5']).group_by('opening').wins()
+
+        selected = [game for game in self.games
+                    if game['whiteelo'].isdigit() and game['blackelo'].isdigit()
+                    and 0 < abs(int(game['whiteelo']) - int(game['blackelo'])) < 200
+                    and game['w1'] == 'e4' and game['b1'] == 'e5']
+
+        self.assertEqual(result, win_loss_by_opening(selected))
+
+
+    def test_filters_match_the_existing_functions(self):
+        """
+        Test prefix, opening and date filters against win_loss_by_moves and select_time_range.
+        """
+
+        self.assertEqual(query(self.games).where(prefix=['e4', 'c5']).wins(), win_loss_by_moves(self.games, ['e4', 'c5']))
+
+        start = int(np.median(self.database.timestamps))
+        expected = [game for game in select_time_range(self.games, start, None) if game['opening'] == 'Sicilian Defense']
+        self.assertEqual(query(self.database).where(date=(start, None), opening='Sicilian Defense').count(), len(expected))
+        self.assertEqual(query(self.database).where(opening='No Such Opening').wins(), (0, 0))
+
+
+    def test_full_length_prefix(self):
+        """
+        Test that a complete 40-ply line matches its games, alone and together with a player.
+        """
+
+        game = next(game for game in self.games if game['b20'] != '-' and game['result'] in ('1-0', '0-1'))
+        moves = [game[key] for key in MOVE_KEYS]
+
+        self.assertEqual(query(self.database).where(prefix=moves).wins(), win_loss_by_moves(self.games, moves))
+        self.assertGreater(query(self.database).where(prefix=moves, player=game['white']).count(), 0)
+        self.assertEqual(self.database.explorer.next_move_stats(moves), {})
+
+
+    def test_plan_starts_with_the_most_selective_index(self):
+        """
+        Test that a rare player is used before a common prefix and unindexed filters come last.
+        """
+
+        player = self.games[0]['white']
+        plan = query(self.database).where(elo_diff=(0, 100), prefix=['e4'], player=player).plan()
+
+        self.assertEqual([name for name, _ in plan], ['player', 'prefix', 'elo_diff'])
+        self.assertLess(plan[0][1], plan[1][1])
+
+        with self.assertRaises(ValueError):
+            query(self.database).where(colour='white')
+
+
+    def test_player_queries_count_games_against_oneself_once(self):
+        """
+        Test that a game with the same player on both sides is counted once by a player-first plan.
+        """
+
+        games = self.games + [dict(self.games[0], white='mirror', black='mirror', result='1-0')]
+        mirror = query(games).where(player='mirror')
+
+        self.assertEqual(mirror.count(), 1)
+        self.assertEqual(mirror.wins(), (1, 0))
+        self.assertEqual(mirror.where(opening=self.games[0]['opening']).plan()[0][0], 'player')
+        self.assertEqual(mirror.where(opening=self.games[0]['opening']).count(), 1)
+
+
+    def test_plan_sizes_are_exact(self):
+        """
+        Test that the sizes read from the indexes equal the number of rows each filter selects.
+        """
+
+        start = int(np.median(self.database.timestamps))
+        filters = {'player': self.games[0]['white'], 'opening': ['Sicilian Defense', 'Sicilian Defense', 'Nope'],
+                   'date': (start, None), 'prefix': ['d4']}
+
+        for name, size in query(self.database).where(**filters).plan():
+            self.assertEqual(size, query(self.database).where(**{name: filters[name]}).count(), name)
+
+
+class TestFollow(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Create an empty file to append the small Lichess sample to.
+        """
+
+        with open(LICHESS_SMALL, 'rb') as file:
+            self.data = file.read()
+        self.games = read_pgn(LICHESS_SMALL)
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, 'live.pgn')
+        open(self.file_name, 'wb').close()
+
+
+    def tearDown(self):
+        """
+        Remove the followed file.
+        """
+
+        self.directory.cleanup()
+
+
+    def test_partial_games_wait_for_the_next_poll(self):
+        """
+        Test that appending the file in pieces cut mid-game gives the same games and statistics as read_pgn.
+        """
+
+        follower = PgnFollower(self.file_name)
+        cuts = [0, len(self.data) // 3, len(self.data) // 3 + 7, len(self.data) - 5, len(self.data)]
+
+        for start, stop in zip(cuts[:-1], cuts[1:]):
+            with open(self.file_name, 'ab') as file:
+                file.write(self.data[start:stop])
+            follower.poll()
+
+            # The offset never passes the end of a complete game.
+            self.assertLessEqual(follower.offset, stop)
+
+        statistics = follower.statistics
+        self.assertEqual(statistics.games, self.games)
+        self.assertEqual(follower.offset, len(self.data))
+        self.assertEqual(statistics.win_loss_by_opening(), win_loss_by_opening(self.games))
+        self.assertEqual(statistics.win_loss_by_elo(0, 200), win_loss_by_elo(self.games, 0, 200))
+        self.assertEqual(statistics.win_loss_by_moves(['e4', 'c5']), win_loss_by_moves(self.games, ['e4', 'c5']))
+        self.assertEqual(follower.poll(), [])
+
+
+    def test_truncated_file_resets_statistics_in_place(self):
+        """
+        Test that after the file is replaced by a shorter one, the caller's statistics count only the new file.
+        """
+
+        with open(self.file_name, 'wb') as file:
+            file.write(self.data)
+
+        statistics = LiveStatistics()
+        follower = PgnFollower(self.file_name, statistics=statistics)
+        follower.poll()
+
+        with open(EXAMPLE, 'rb') as source, open(self.file_name, 'wb') as file:
+            file.write(source.read())
+        follower.poll()
+
+        example_games = read_pgn(EXAMPLE)
+        self.assertIs(follower.statistics, statistics)
+        self.assertEqual(statistics.games, example_games)
+        self.assertEqual(follower.stats.games, len(example_games))
+
+
+class TestAnnotations(unittest.TestCase):
+
+    def test_comments_do_not_corrupt_moves(self):
+        """
+        Test that eval comments and "1..." numbers no longer end up in the move slots.
+        """
+
+        games, clocks, evals = read_pgn(OWN_EXAMPLE, annotations=True)
+
+        self.assertEqual([games[0][key] for key in MOVE_KEYS[:6]], ['e4', 'e6', 'Bc4', 'd5', 'exd5', 'exd5'])
+        self.assertEqual(games[0]['w11'], 'c4', "Expected the '?!' suffix to be removed")
+        self.assertEqual((clocks.shape, clocks.dtype), ((1, 40), np.float32))
+        self.assertAlmostEqual(float(evals[0, 2]), -0.31, places=5)
+        self.assertTrue(np.isnan(clocks).all())
+
+
+    def test_clock_variations_and_nags(self):
+        """
+        Test clock extraction and that variations and NAGs are skipped.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'annotated.pgn')
+            with open(file_name, 'w', encoding='utf-8') as file:
+                file.write('[Result "0-1"]\n\n'
+                           '1. e4 { [%clk 0:01:00] } 1... e5 $1 { [%clk 0:00:59.5] [%eval #-2] } '
+                           '2. Nf3 (2. f4 exf4 (2... d5)) 2... Nc6 0-1\n')
+
+            games, clocks, evals = read_pgn(file_name, annotations=True)
+
+        self.assertEqual([games[0][key] for key in MOVE_KEYS[:5]], ['e4', 'e5', 'Nf3', 'Nc6', '-'])
+        self.assertEqual(clocks[0, :2].tolist(), [60.0, 59.5])
+        self.assertEqual(float(evals[0, 1]), -MATE_EVAL)
+        self.assertTrue(np.isnan(clocks[0, 2]))
+
+
+class TestLenientIngest(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Build a file with valid games around several kinds of malformed records.
+        """
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, 'mixed.pgn')
+        self.quarantine = os.path.join(self.directory.name, 'quarantine.pgn')
+
+        with open(EXAMPLE, 'rb') as file:
+            valid = [b'[Event' + record for record in file.read().strip().split(b'\n\n[Event')[1:4]]
+
+        self.bad_records = [
+            b'[White "broken\n[Result "1-0"]\n\n1. e4 e5 1-0',
+            b'[White "truncated"]\n[Result "0-1"]\n\n1. d4 d5 2. c4',
+            b'[White "\xff\xfe"]\n[Result "1-0"]\n\n1. e4 1-0',
+        ]
+
+        with open(self.file_name, 'wb') as file:
+            file.write(b'\n\n'.join([valid[0], self.bad_records[0], valid[1], self.bad_records[1], valid[2], self.bad_records[2]]) + b'\n')
+
+
+    def tearDown(self):
+        """
+        Remove the generated files.
+        """
+
+        self.directory.cleanup()
+
+
+    def test_malformed_games_are_quarantined(self):
+        """
+        Test that valid games parse as with read_pgn while bad records go to quarantine with their offsets.
+        """
+
+        stats = IngestStats()
+        games = read_pgn_lenient(self.file_name, self.quarantine, stats)
+
+        self.assertEqual(games, read_pgn(EXAMPLE)[1:4])
+        self.assertEqual(stats.games, 3)
+        self.assertEqual(stats.reasons, {'malformed tag': 1, 'truncated moves': 1, 'not utf-8': 1})
+
+        with open(self.file_name, 'rb') as file:
+            content = file.read()
+        with open(self.quarantine, 'rb') as file:
+            quarantined = file.read()
+
+        for record in self.bad_records:
+            self.assertIn(f'% offset {content.index(record)}:'.encode('utf-8'), quarantined)
+            self.assertIn(record, quarantined)
+
+
+    def test_truncated_game_does_not_swallow_the_next_one(self):
+        """
+        Test that a game cut off without a blank line still ends where the next game starts.
+        """
+
+        with open(EXAMPLE, 'rb') as file:
+            valid = file.read().strip().split(b'\n\n[Event')[0]
+
+        with open(self.file_name, 'wb') as file:
+            file.write(b'[White "cut"]\n\n1. e4 e5 2. Nf3\n' + valid + b'\n')
+
+        stats = IngestStats()
+        self.assertEqual(read_pgn_lenient(self.file_name, stats=stats), read_pgn(EXAMPLE)[:1])
+        self.assertEqual(stats.malformed, 1)
+
+
+    def test_pipelined_ingest_matches_sequential_ingest(self):
+        """
+        Test that the reader thread gives the same games and statistics for any block size.
+        """
+
+        expected_stats = IngestStats()
+        expected = read_pgn_lenient(self.file_name, stats=expected_stats)
+
+        for block_size in (16, 1000, DEFAULT_BLOCK_SIZE):
+            stats = IngestStats()
+            games = list(iter_games(self.file_name, stats=stats, pipelined=True, block_size=block_size, queue_size=1))
+
+            self.assertEqual(games, expected, f"Mismatch with block size {block_size}")
+            self.assertEqual(stats.as_dict(), expected_stats.as_dict())
+
+        with open(LICHESS_SMALL, 'rb') as file:
+            self.assertEqual(list(iter_records_pipelined(LICHESS_SMALL, 4096)), list(iter_records(file)))
+
+
+    def test_stopping_early_ends_the_reader_thread(self):
+        """
+        Test that closing the game stream stops the blocked reader thread.
+        """
+
+        threads = threading.active_count()
+        games = iter_games(LICHESS_SMALL, pipelined=True, block_size=64, queue_size=1)
+        next(games)
+        games.close()
+
+        self.assertEqual(threading.active_count(), threads)
+
+
+class TestSharedGameTable(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Encode the small Lichess sample.
+        """
+
+        self.games = read_pgn(LICHESS_SMALL)
+        self.table = GameTable.from_games(self.games)
+
+
+    def test_attached_table_shares_memory(self):
+        """
+        Test that an attached table sees the exported columns and writes through the same memory.
+        """
+
+        with SharedGameTable.export(self.table) as shared:
+            attached = SharedGameTable.attach(shared.handle)
+
+            self.assertTrue((attached.table.moves == self.table.moves).all())
+            self.assertEqual(attached.table.decode('opening', 0), self.table.decode('opening', 0))
+            self.assertEqual(win_loss_by_opening(attached.table), win_loss_by_opening(self.games))
+
+            attached.table.white_elo[0] = 9999
+            self.assertEqual(shared.table.white_elo[0], 9999)
+            attached.close()
+
+
+    def test_workers_attach_by_handle(self):
+        """
+        Test that worker processes attached through the handle compute the same win/loss counts.
+        """
+
+        self.assertEqual(parallel_win_loss_by_opening(self.table, workers=3), win_loss_by_opening(self.games))
+
+
+if __name__ == '__main__':
+    unittest.main()
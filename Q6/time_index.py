@@ -0,0 +1,145 @@
+"""
+Provides TimeIndex, the games of a file sorted by their [UTCDate] and [UTCTime]
+headers, so a time range is found with two binary searches instead of a pass over
+every game. The analysis functions of task6.py accept start/end arguments and use
+the index when they are given one.
+
+Timestamps are integer seconds since 1970-01-01 UTC. Read the games with
+read_pgn(file_name, extra_tags=TIME_TAGS) to keep the two headers.
+
+Author : Szeto Lok
+"""
+
+import calendar
+import datetime
+import numpy as np
+
+
+# The headers needed to place a game in time.
+TIME_TAGS = ('utcdate', 'utctime')
+
+# Timestamp used when the date is missing or malformed; it sorts before every real time.
+MISSING_TIMESTAMP = -1
+
+
+def timestamp(utc_date: str, utc_time: str = '00:00:00') -> int:
+    """
+    Converts PGN date and time headers into a timestamp.
+
+    Args:
+        utc_date (str): A date such as '2013.03.01' ('-' separators are accepted too).
+        utc_time (str): A time such as '18:30:00'; unknown or impossible times count as midnight.
+
+    Returns:
+        int: Seconds since 1970-01-01 UTC, or MISSING_TIMESTAMP for a malformed or impossible date.
+    """
+
+    date_parts = utc_date.replace('-', '.').split('.')
+    if len(date_parts) != 3 or not all(part.isdigit() for part in date_parts):
+        return MISSING_TIMESTAMP
+
+    time_parts = utc_time.split(':')
+    if len(time_parts) != 3 or not all(part.isdigit() for part in time_parts):
+        time_parts = (0, 0, 0)
+
+    # Numeric but impossible dates such as 2013.02.30 are missing too; an impossible time counts as midnight.
+    try:
+        date = datetime.date(*(int(part) for part in date_parts))
+    except ValueError:
+        return MISSING_TIMESTAMP
+
+    try:
+        clock = datetime.time(*(int(part) for part in time_parts))
+    except ValueError:
+        clock = datetime.time()
+
+    return calendar.timegm((date.year, date.month, date.day, clock.hour, clock.minute, clock.second))
+
+
+def game_timestamp(game: dict) -> int:
+    """
+    Returns the timestamp of a game read with the TIME_TAGS extra tags.
+    """
+
+    return timestamp(game['utcdate'], game['utctime'])
+
+
+class TimeIndex:
+    """
+    Games sorted by time, with their timestamps for binary search.
+
+    Instance Variables:
+        games (list[dict]): The games in time order (games without a date first).
+        timestamps (np.ndarray): int64 timestamp of each game, in the same order.
+    """
+
+    def __init__(self, games: list[dict]) -> None:
+        """
+        Sorts the games by time (games with the same time keep their file order).
+
+        Arguments:
+            games (list[dict]): Games read with the TIME_TAGS extra tags.
+        """
+
+        timestamps = np.fromiter((game_timestamp(game) for game in games), dtype=np.int64, count=len(games))
+        order = np.argsort(timestamps, kind='stable')
+
+        self.games = [games[row] for row in order]
+        self.timestamps = timestamps[order]
+
+
+    def between(self, start: int = None, end: int = None) -> list[dict]:
+        """
+        Returns the games played in [start, end).
+
+        Arguments:
+            start (int): First timestamp to include, or None for no lower limit.
+            end (int): First timestamp to exclude, or None for no upper limit.
+
+        Returns:
+            list[dict]: The games in range, in time order. Games without a date are
+                only returned when neither limit is given.
+        """
+
+        if start is None and end is None:
+            return self.games
+
+        # Two binary searches find the first and last game in range.
+        first = np.searchsorted(self.timestamps, max(start if start is not None else 0, 0), side='left')
+        last = len(self.timestamps) if end is None else np.searchsorted(self.timestamps, end, side='left')
+
+        return self.games[first:max(first, last)]
+
+
+    def __len__(self) -> int:
+        """
+        Returns the number of indexed games.
+        """
+
+        return len(self.games)
+
+
+def select_time_range(games, start: int = None, end: int = None) -> list[dict]:
+    """
+    Restricts games to the time range [start, end) for the analysis functions.
+
+    Args:
+        games (list[dict] | TimeIndex): The games. A TimeIndex answers with binary
+            search; a plain list (read with TIME_TAGS) is filtered game by game.
+        start (int): First timestamp to include, or None.
+        end (int): First timestamp to exclude, or None.
+
+    Returns:
+        list[dict]: The games in range (all games when no limit is given).
+    """
+
+    if isinstance(games, TimeIndex):
+        return games.between(start, end)
+
+    if start is None and end is None:
+        return games
+
+    # Unsorted list: check every game, keeping the file order.
+    lower = max(start if start is not None else 0, 0)
+    return [game for game in games
+            if game_timestamp(game) >= lower and (end is None or game_timestamp(game) < end)]
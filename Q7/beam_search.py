@@ -0,0 +1,201 @@
+"""
+Provides an approximate, beam-search version of winning_statistics for depths where
+the exhaustive search explodes. At every ply only the beam_width most promising
+prefixes are kept, ranked by how high a white win probability they could still reach
+(which grows with both their game count and their win rate).
+
+Every dropped prefix has a known upper bound on the probability any of its sequences
+can reach, so the beam search also reports how far below the exhaustive answer its
+own answer can be at most.
+
+Author : Szeto Lok
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from task7 import *
+
+
+DEFAULT_BEAM_WIDTH = 50
+
+
+def beam_search(df: pd.DataFrame, depth: int, tolerance: int, beam_width: int = DEFAULT_BEAM_WIDTH,
+                stats: SearchStats = None) -> tuple[tuple[float, list[str], int], float]:
+    """
+    Searches for the best opening sequence keeping only beam_width prefixes per ply.
+
+    Args:
+        df (pd.DataFrame): The games, as returned by read_games_frame.
+        depth (int): Number of moves (plies) in the sequence.
+        tolerance (int): Minimum number of games a sequence needs.
+        beam_width (int): Number of prefixes kept at each ply.
+        stats (SearchStats): Optional statistics to record nodes and search time into.
+
+    Returns:
+        tuple[tuple[float, list[str], int], float]: The result in the winning_statistics
+            format, and the largest amount the exhaustive probability can exceed it by
+            (0.0 means the probability is guaranteed to be the exhaustive one).
+    """
+
+    if stats is not None:
+        start = time.perf_counter()
+
+    white_win = df['result'].eq('1-0').to_numpy()
+
+    # Each beam entry is (moves, rank, rows of the games that follow the moves)
+    beam = [([], (), np.arange(len(df)))]
+
+    # Highest probability any dropped prefix could still have reached
+    dropped_bound = 0.0
+
+    # Best complete sequence as (probability, rank, sequence, total)
+    best = (0.0, (), [], 0)
+
+    if depth == 0 and len(df) >= tolerance and len(df) > 0:
+        best = (white_win.sum() / len(df), (), [], len(df))
+
+    for ply in range(depth):
+        column = move_column(ply)
+
+        # read_pgn keeps 40 plies, so there are no longer sequences
+        if column not in df:
+            break
+
+        values = df[column].to_numpy()
+        last_ply = ply == depth - 1
+
+        # Every child of every prefix in the beam, as
+        # (sort key, beam index, position, move, white wins, total)
+        candidates = []
+        child_codes = []
+
+        for beam_index, (moves, rank, rows) in enumerate(beam):
+
+            # factorize numbers moves in order of first appearance, which is their rank
+            codes, moves_here = pd.factorize(values[rows])
+            totals = np.bincount(codes, minlength=len(moves_here))
+            wins = np.bincount(codes, weights=white_win[rows], minlength=len(moves_here)).astype(np.int64)
+            child_codes.append(codes)
+
+            if stats is not None:
+                stats.visit(depth - ply)
+                stats.mask_operations += 1
+                stats.rows_scanned += len(rows)
+
+            for position, move in enumerate(moves_here):
+                total = int(totals[position])
+
+                # Skip the placeholder and prefixes that are already too rare
+                if move == '-' or total < tolerance:
+                    continue
+
+                white_wins = int(wins[position])
+                bound = probability_bound(white_wins, tolerance)
+                sort_key = (-bound, -white_wins / total, -total, rank + (position,))
+                candidates.append((sort_key, beam_index, position, move, white_wins, total))
+
+        # On the last ply every candidate is a complete sequence: compare them all
+        if last_ply:
+            for (_, _, _, candidate_rank), beam_index, position, move, white_wins, total in candidates:
+                probability = white_wins / total
+                if is_better(probability, candidate_rank, best[0], best[1]):
+                    best = (probability, candidate_rank, beam[beam_index][0] + [move], total)
+
+            if stats is not None:
+                stats.visit(0)
+            break
+
+        # Keep the most promising prefixes and remember the best bound that was dropped
+        candidates.sort(key=lambda candidate: candidate[0])
+        kept = candidates[:beam_width]
+
+        if len(candidates) > beam_width:
+            dropped_bound = max(dropped_bound, -candidates[beam_width][0][0])
+            if stats is not None:
+                stats.pruned_nodes += len(candidates) - beam_width
+
+        next_beam = []
+        for (_, _, _, candidate_rank), beam_index, position, move, _, _ in kept:
+            moves, _, rows = beam[beam_index]
+            next_beam.append((moves + [move], candidate_rank, rows[child_codes[beam_index] == position]))
+
+        beam = next_beam
+
+    if stats is not None:
+        stats.add_time('search', time.perf_counter() - start)
+
+    probability, _, sequence, total = best
+    result = (round(probability, 4), sequence, total) if total > 0 else (0.0, [], 0)
+
+    return result, max(0.0, dropped_bound - probability)
+
+
+def winning_statistics_beam(file_name: str, depth: int, tolerance: int, beam_width: int = DEFAULT_BEAM_WIDTH,
+                            stats: SearchStats = None) -> tuple[tuple[float, list[str], int], float]:
+    """
+    Approximates winning_statistics with a beam search.
+
+    Args:
+        file_name (str): Path to the PGN file containing chess games.
+        depth (int): Number of moves (plies) in the sequence to analyze.
+        tolerance (int): Minimum number of games required to consider a sequence valid.
+        beam_width (int): Number of prefixes kept at each ply.
+        stats (SearchStats): Optional statistics to record into.
+
+    Returns:
+        tuple[tuple[float, list[str], int], float]: The approximate result and the most the
+            exhaustive probability can exceed it by (see beam_search).
+    """
+
+    df = read_games_frame(file_name, stats)
+
+    return beam_search(df, depth, tolerance, beam_width, stats)
+
+
+def compare_beam(file_name: str, depths: list[int], tolerance: int, beam_width: int = DEFAULT_BEAM_WIDTH) -> list[dict]:
+    """
+    Runs the beam search and the exhaustive search side by side to measure the real error.
+
+    Args:
+        file_name (str): Path to the PGN file containing chess games.
+        depths (list[int]): Depths small enough for the exhaustive search to finish.
+        tolerance (int): Minimum number of games required to consider a sequence valid.
+        beam_width (int): Number of prefixes kept at each ply.
+
+    Returns:
+        list[dict]: One entry per depth with 'depth', 'beam', 'exhaustive' (both results),
+            'gap' (exhaustive minus beam probability), 'gap_bound' (the beam's own
+            guarantee), 'same_sequence', 'beam_seconds' and 'exhaustive_seconds'.
+    """
+
+    df = read_games_frame(file_name)
+
+    report = []
+    for depth in depths:
+        start = time.perf_counter()
+        beam_result, gap_bound = beam_search(df, depth, tolerance, beam_width)
+        beam_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = best_sequences(df, depth, tolerance)
+        exhaustive_seconds = time.perf_counter() - start
+
+        if results:
+            probability, _, sequence, total = results[0]
+            exhaustive_result = (round(probability, 4), sequence, total)
+        else:
+            exhaustive_result = (0.0, [], 0)
+
+        report.append({
+            'depth': depth,
+            'beam': beam_result,
+            'exhaustive': exhaustive_result,
+            'gap': round(exhaustive_result[0] - beam_result[0], 4),
+            'gap_bound': round(gap_bound, 4),
+            'same_sequence': beam_result[1] == exhaustive_result[1],
+            'beam_seconds': round(beam_seconds, 6),
+            'exhaustive_seconds': round(exhaustive_seconds, 6),
+        })
+
+    return report
@@ -0,0 +1,199 @@
+"""
+Perft-style benchmark suite for count_positions (and therefore binh_chess.possible_moves).
+Runs a fixed set of positions and depths with known move counts, reports wall time,
+nodes per second and peak memory as JSON, and compares two saved runs for regressions.
+
+Usage:
+    python benchmark_perft.py --suite quick --output before.json
+    python benchmark_perft.py --suite quick --output after.json
+    python benchmark_perft.py --compare before.json after.json
+
+Author : Szeto Lok
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from task7 import count_positions
+
+
+# The French Defense position used in the part 1 examples.
+FRENCH_POSITION = ['e4', 'e6', 'Nf3', 'd5', 'exd5', 'Qxd5', 'd4', 'Nc6', 'Nc3', 'Qd7', 'Be3', 'Nf6']
+
+# Benchmark cases as (name, moves, depth, expected number of positions).
+PERFT_CASES = [
+    ('start-1', [], 1, 20),
+    ('start-2', [], 2, 400),
+    ('start-3', [], 3, 8902),
+    ('start-4', [], 4, 197281),
+    ('french-1', FRENCH_POSITION, 1, 40),
+    ('french-2', FRENCH_POSITION, 2, 1391),
+    ('french-3', FRENCH_POSITION, 3, 55707),
+]
+
+# Named suites: 'quick' runs in seconds, 'full' includes the slow depth 4 start position.
+SUITES = {
+    'quick': ['start-1', 'start-2', 'start-3', 'french-1', 'french-2'],
+    'full': [case[0] for case in PERFT_CASES],
+}
+
+# A case is reported as a regression when it becomes this much slower (10%).
+DEFAULT_THRESHOLD = 0.10
+
+
+def run_case(name: str, moves: list[str], depth: int, expected: int, repeat: int = 1) -> dict:
+    """
+    Runs one perft case and measures it.
+
+    Args:
+        name (str): Name of the case.
+        moves (list[str]): Moves in SAN defining the position.
+        depth (int): Number of plies to count.
+        expected (int): The known correct number of positions.
+        repeat (int): Number of timed runs; the fastest one is reported.
+
+    Returns:
+        dict: The measurements of the case (see run_suite for the fields).
+    """
+
+    # Time the case without tracemalloc, which would slow it down.
+    best_seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        nodes = count_positions(list(moves), depth)
+        seconds = time.perf_counter() - start
+
+        if best_seconds is None or seconds < best_seconds:
+            best_seconds = seconds
+
+    # Measure peak memory in a separate, untimed run.
+    tracemalloc.start()
+    count_positions(list(moves), depth)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'name': name,
+        'depth': depth,
+        'expected': expected,
+        'nodes': nodes,
+        'correct': nodes == expected,
+        'seconds': round(best_seconds, 6),
+        'nodes_per_second': round(nodes / best_seconds, 1) if best_seconds > 0 else None,
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def run_suite(suite: str = 'quick', repeat: int = 1) -> dict:
+    """
+    Runs every case of a suite.
+
+    Args:
+        suite (str): Name of a suite in SUITES.
+        repeat (int): Number of timed runs per case.
+
+    Returns:
+        dict: {'suite', 'python', 'platform', 'cases'}, where each case has the fields
+            name, depth, expected, nodes, correct, seconds, nodes_per_second and peak_memory_bytes.
+    """
+
+    cases_by_name = {case[0]: case for case in PERFT_CASES}
+
+    results = []
+    for name in SUITES[suite]:
+        results.append(run_case(*cases_by_name[name], repeat=repeat))
+
+    return {
+        'suite': suite,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cases': results,
+    }
+
+
+def compare_runs(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """
+    Compares two benchmark runs case by case.
+
+    Args:
+        baseline (dict): The earlier run, as returned by run_suite.
+        current (dict): The later run, as returned by run_suite.
+        threshold (float): Relative slowdown that counts as a regression (0.10 = 10%).
+
+    Returns:
+        list[str]: One message per regression (a wrong count or a slowdown above
+            threshold); an empty list means no regressions.
+    """
+
+    baseline_cases = {case['name']: case for case in baseline['cases']}
+
+    regressions = []
+    for case in current['cases']:
+
+        # A wrong node count is always a regression, whatever the timing.
+        if not case['correct']:
+            regressions.append(f"{case['name']}: counted {case['nodes']} positions, expected {case['expected']}")
+            continue
+
+        # Cases missing from the baseline cannot be compared.
+        old_case = baseline_cases.get(case['name'])
+        if old_case is None or old_case['seconds'] <= 0:
+            continue
+
+        change = case['seconds'] / old_case['seconds'] - 1
+        if change > threshold:
+            regressions.append(f"{case['name']}: {old_case['seconds']:.4f}s -> {case['seconds']:.4f}s (+{change:.1%})")
+
+    return regressions
+
+
+def main(arguments: list[str]) -> int:
+    """
+    Command line entry point.
+
+    Args:
+        arguments (list[str]): Command line arguments (without the program name).
+
+    Returns:
+        int: Exit status; 1 when a comparison finds regressions or a count is wrong.
+    """
+
+    parser = argparse.ArgumentParser(description='Perft benchmark for count_positions.')
+    parser.add_argument('--suite', choices=sorted(SUITES), default='quick')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help='compare two JSON reports')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    options = parser.parse_args(arguments)
+
+    # Comparison mode: load both reports and list the regressions.
+    if options.compare:
+        with open(options.compare[0]) as file:
+            baseline = json.load(file)
+        with open(options.compare[1]) as file:
+            current = json.load(file)
+
+        regressions = compare_runs(baseline, current, options.threshold)
+        for message in regressions:
+            print(message)
+
+        return 1 if regressions else 0
+
+    # Benchmark mode: run the suite and write the JSON report.
+    report = run_suite(options.suite, options.repeat)
+    text = json.dumps(report, indent=2)
+
+    if options.output:
+        with open(options.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+    return 0 if all(case['correct'] for case in report['cases']) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
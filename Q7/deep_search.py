@@ -0,0 +1,340 @@
+"""
+Provides an iterative version of the winning_statistics search for deep searches.
+DeepSearch walks the move tree with an explicit stack instead of Python recursion,
+keeps its state in numpy arrays, can stop when a time budget runs out (returning the
+best sequence found so far) and can save a checkpoint to continue later.
+
+Results are identical to winning_statistics: the same bound-based pruning is used,
+and ties are broken by the same search order rank.
+
+Author : Szeto Lok
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from task7 import *
+
+
+class SearchLevel:
+    """
+    The children of one node on the explicit search stack, in search order.
+
+    Instance Variables:
+        rows (np.ndarray): Row numbers of the games that follow the node's sequence.
+        column (np.ndarray): Move code of the next ply for each of those games.
+        codes (np.ndarray): Move code of each child worth searching.
+        wins (np.ndarray): White wins below each child.
+        totals (np.ndarray): Games below each child.
+        positions (np.ndarray): Rank of each child in the original search order.
+        cursor (int): Index of the next child to search.
+    """
+
+    __slots__ = ('rows', 'column', 'codes', 'wins', 'totals', 'positions', 'cursor')
+
+    def __init__(self, rows: np.ndarray, column: np.ndarray, codes: np.ndarray, wins: np.ndarray,
+                 totals: np.ndarray, positions: np.ndarray) -> None:
+        """
+        Initialize a level with its cursor on the first child.
+        """
+
+        self.rows = rows
+        self.column = column
+        self.codes = codes
+        self.wins = wins
+        self.totals = totals
+        self.positions = positions
+        self.cursor = 0
+
+
+class DeepSearch:
+    """
+    Explicit-stack, resumable search for the best opening sequence.
+
+    Instance Variables:
+        depth (int): Number of plies in each sequence.
+        tolerance (int): Minimum number of games a sequence needs.
+        move_names (np.ndarray): The SAN move of each move code.
+        codes (np.ndarray): int32 array (games, plies) of move codes (-1 for '-').
+        white_win (np.ndarray): Whether white won each game.
+        stack (list[SearchLevel]): The open levels of the search.
+        path_codes (np.ndarray): Move code chosen at each level of the stack.
+        path_rank (np.ndarray): Search order rank of the move chosen at each level.
+        best (tuple): (probability, rank, sequence, total) of the best sequence so far.
+        finished (bool): True once the whole tree has been searched.
+        stats (SearchStats): Optional statistics to record into.
+    """
+
+    def __init__(self, df: pd.DataFrame, depth: int, tolerance: int, stats: SearchStats = None) -> None:
+        """
+        Prepares the search over a DataFrame of games.
+
+        Arguments:
+            df (pd.DataFrame): The games, as returned by read_games_frame.
+            depth (int): Number of plies in each sequence.
+            tolerance (int): Minimum number of games a sequence needs.
+            stats (SearchStats): Optional statistics to record into.
+        """
+
+        self.depth = depth
+        self.tolerance = tolerance
+        self.stats = stats
+
+        # read_pgn keeps 40 plies, so deeper sequences never appear in the games.
+        plies = min(depth, 40)
+        columns = [move_column(move_index) for move_index in range(plies)]
+
+        # Encode the moves as integers once; '-' becomes -1 so it is easy to drop.
+        values = df[columns].to_numpy().ravel() if plies > 0 else np.array([], dtype=object)
+        move_codes, self.move_names = pd.factorize(values)
+        self.move_names = np.asarray(self.move_names, dtype=object)
+        self.codes = move_codes.reshape(len(df), plies).astype(np.int32)
+
+        placeholder = np.flatnonzero(self.move_names == '-')
+        if len(placeholder) > 0:
+            self.codes[self.codes == placeholder[0]] = -1
+
+        self.white_win = df['result'].eq('1-0').to_numpy()
+
+        self.path_codes = np.zeros(depth, dtype=np.int32)
+        self.path_rank = np.zeros(depth, dtype=np.int32)
+        self.best = (0.0, (), [], 0)
+        self.stack = []
+        self.finished = False
+
+        # Depth 0 is a single sequence (no moves) and depths past 40 plies have none.
+        if depth == 0:
+            self._visit_leaf(int(self.white_win.sum()), len(df))
+            self.finished = True
+        elif depth > 40:
+            self.finished = True
+        else:
+            self.stack.append(self._expand(np.arange(len(df)), 0))
+
+
+    def _expand(self, rows: np.ndarray, level: int) -> SearchLevel:
+        """
+        Builds the level listing the children of a node.
+
+        Arguments:
+            rows (np.ndarray): Row numbers of the games that follow the node's sequence.
+            level (int): Number of plies in the node's sequence.
+
+        Returns:
+            SearchLevel: The children worth searching, in search order.
+        """
+
+        if self.stats is not None:
+            self.stats.visit(self.depth - level)
+            self.stats.mask_operations += 1
+            self.stats.rows_scanned += len(rows)
+
+        column = self.codes[rows, level]
+
+        # Group the games by next move: counts, white wins and first appearance.
+        unique_codes, first_index, inverse, totals = np.unique(column, return_index=True,
+                                                               return_inverse=True, return_counts=True)
+        wins = np.bincount(inverse.ravel(), weights=self.white_win[rows], minlength=len(unique_codes)).astype(np.int64)
+
+        # The rank of each move is its position in order of first appearance.
+        positions = np.argsort(np.argsort(first_index))
+
+        # Drop the '-' placeholder and moves with too few games.
+        keep = (unique_codes >= 0) & (totals >= self.tolerance)
+        if self.stats is not None:
+            self.stats.pruned_nodes += int(np.count_nonzero((unique_codes >= 0) & ~keep))
+
+        unique_codes, wins, totals, positions = unique_codes[keep], wins[keep], totals[keep], positions[keep]
+
+        # Highest bound first, then highest win rate, then original order.
+        bounds = np.array([probability_bound(int(win_count), self.tolerance) for win_count in wins])
+        order = np.lexsort((positions, -wins / np.maximum(totals, 1), -bounds))
+
+        return SearchLevel(rows, column, unique_codes[order], wins[order], totals[order], positions[order])
+
+
+    def _visit_leaf(self, white_wins: int, total: int) -> None:
+        """
+        Compares the complete sequence on the path with the best one so far.
+
+        Arguments:
+            white_wins (int): White wins among the games following the sequence.
+            total (int): Number of games following the sequence.
+        """
+
+        if self.stats is not None:
+            self.stats.visit(0)
+
+        if total < self.tolerance or total == 0:
+            return
+
+        probability = white_wins / total
+        rank = tuple(int(position) for position in self.path_rank[:self.depth])
+
+        if is_better(probability, rank, self.best[0], self.best[1]):
+            sequence = [str(self.move_names[code]) for code in self.path_codes[:self.depth]]
+            self.best = (probability, rank, sequence, total)
+
+
+    def run(self, time_budget: float = None) -> tuple[float, list[str], int]:
+        """
+        Continues the search until it finishes or the time budget runs out.
+
+        Arguments:
+            time_budget (float): Maximum number of seconds to search (None = no limit).
+
+        Returns:
+            tuple[float, list[str], int]: The best sequence found so far, in the
+                winning_statistics format. It is the final answer once finished is True.
+        """
+
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+
+        if self.stats is not None:
+            start = time.perf_counter()
+
+        while self.stack:
+
+            # Out of time: keep the stack as it is so the search can be resumed.
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+            level = len(self.stack) - 1
+            frame = self.stack[-1]
+
+            # All children of this node are done: go back up.
+            if frame.cursor == len(frame.codes):
+                self.stack.pop()
+                continue
+
+            child = frame.cursor
+            frame.cursor += 1
+
+            code = int(frame.codes[child])
+            white_wins = int(frame.wins[child])
+            total = int(frame.totals[child])
+
+            self.path_codes[level] = code
+            self.path_rank[level] = frame.positions[child]
+
+            # Skip the child if nothing below it can beat the best sequence.
+            rank = tuple(int(position) for position in self.path_rank[:level + 1])
+            if not is_better(probability_bound(white_wins, self.tolerance), rank, self.best[0], self.best[1]):
+                if self.stats is not None:
+                    self.stats.pruned_nodes += 1
+                continue
+
+            # A complete sequence is compared directly; otherwise its children are pushed.
+            if level + 1 == self.depth:
+                self._visit_leaf(white_wins, total)
+            else:
+                child_rows = frame.rows[frame.column == code]
+                self.stack.append(self._expand(child_rows, level + 1))
+
+        if self.stats is not None:
+            self.stats.add_time('search', time.perf_counter() - start)
+
+        self.finished = not self.stack
+
+        return self.result()
+
+
+    def result(self) -> tuple[float, list[str], int]:
+        """
+        Returns the best sequence found so far in the winning_statistics format.
+        """
+
+        probability, _, sequence, total = self.best
+
+        if total > 0:
+            return (round(probability, 4), sequence, total)
+        else:
+            return (0.0, [], 0)
+
+
+    def checkpoint(self) -> dict:
+        """
+        Returns the search state as a JSON serialisable dictionary.
+
+        The games are not included: resume with the same PGN file.
+
+        Returns:
+            dict: The depth, tolerance, best sequence, the open path and each level's cursor.
+        """
+
+        probability, rank, sequence, total = self.best
+        open_levels = len(self.stack)
+
+        return {
+            'depth': self.depth,
+            'tolerance': self.tolerance,
+            'best': [float(probability), list(rank), sequence, total],
+            'path': [str(self.move_names[code]) for code in self.path_codes[:max(open_levels - 1, 0)]],
+            'cursors': [frame.cursor for frame in self.stack],
+            'finished': self.finished,
+        }
+
+
+    @classmethod
+    def from_checkpoint(cls, df: pd.DataFrame, state: dict, stats: SearchStats = None) -> 'DeepSearch':
+        """
+        Rebuilds a search from a checkpoint so it continues where it stopped.
+
+        Arguments:
+            df (pd.DataFrame): The same games the checkpointed search used.
+            state (dict): A dictionary returned by checkpoint().
+            stats (SearchStats): Optional statistics to record into.
+
+        Returns:
+            DeepSearch: The restored search; call run() to continue it.
+        """
+
+        search = cls(df, state['depth'], state['tolerance'], stats)
+
+        probability, rank, sequence, total = state['best']
+        search.best = (probability, tuple(rank), sequence, total)
+
+        if state['finished']:
+            search.stack = []
+            search.finished = True
+            return search
+
+        # Re-expand each open level along the saved path; expansion is deterministic.
+        move_codes = {name: code for code, name in enumerate(search.move_names)}
+        search.stack[0].cursor = state['cursors'][0]
+
+        for level, move in enumerate(state['path']):
+            frame = search.stack[level]
+            code = move_codes[move]
+
+            # The path move is the child just before the cursor of its level.
+            search.path_codes[level] = code
+            search.path_rank[level] = frame.positions[frame.cursor - 1]
+
+            child = search._expand(frame.rows[frame.column == code], level + 1)
+            child.cursor = state['cursors'][level + 1]
+            search.stack.append(child)
+
+        return search
+
+
+def winning_statistics_iterative(file_name: str, depth: int, tolerance: int, time_budget: float = None,
+                                 stats: SearchStats = None) -> tuple[float, list[str], int]:
+    """
+    Runs winning_statistics with the iterative engine, optionally within a time budget.
+
+    Args:
+        file_name (str): Path to the PGN file containing chess games.
+        depth (int): Number of moves (plies) in the sequence to analyze.
+        tolerance (int): Minimum number of games required to consider a sequence valid.
+        time_budget (float): Maximum number of seconds to search (None = no limit).
+        stats (SearchStats): Optional statistics to record into.
+
+    Returns:
+        tuple[float, list[str], int]: The winning_statistics result, or the best sequence
+            found before the time budget ran out.
+    """
+
+    df = read_games_frame(file_name, stats)
+
+    return DeepSearch(df, depth, tolerance, stats).run(time_budget)
@@ -0,0 +1,88 @@
+"""
+Provides SearchStats, an opt-in record of where count_positions and winning_statistics
+spend their work. Pass an instance as the stats argument to collect counters; when
+stats is None (the default) the functions skip all bookkeeping.
+
+Author : Szeto Lok
+"""
+
+
+class SearchStats:
+    """
+    Counters and timers collected during one or more searches.
+
+    Instance Variables:
+        nodes_per_depth (dict[int, int]): Nodes visited, keyed by the depth still to
+            search at that node (0 = leaf).
+        rows_scanned (int): Game rows compared while filtering by move.
+        mask_operations (int): Boolean mask or grouping operations over a move column.
+        pruned_nodes (int): Children skipped without being searched.
+        phase_seconds (dict[str, float]): Wall time per phase, e.g. 'parse',
+            'frame build', 'search' or 'move generation'.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize all counters to zero.
+        """
+
+        self.nodes_per_depth = {}
+        self.rows_scanned = 0
+        self.mask_operations = 0
+        self.pruned_nodes = 0
+        self.phase_seconds = {}
+
+
+    def visit(self, depth: int) -> None:
+        """
+        Records one visited node.
+
+        Arguments:
+            depth (int): The depth still to search at this node.
+        """
+
+        self.nodes_per_depth[depth] = self.nodes_per_depth.get(depth, 0) + 1
+
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        """
+        Adds wall time to a phase.
+
+        Arguments:
+            phase (str): The phase name.
+            seconds (float): Time spent in the phase.
+        """
+
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+
+
+    @property
+    def nodes(self) -> int:
+        """
+        Returns the total number of visited nodes.
+        """
+
+        return sum(self.nodes_per_depth.values())
+
+
+    def as_dict(self) -> dict:
+        """
+        Returns the statistics as a plain (JSON serialisable) dictionary.
+        """
+
+        return {
+            'nodes': self.nodes,
+            'nodes_per_depth': dict(sorted(self.nodes_per_depth.items(), reverse=True)),
+            'rows_scanned': self.rows_scanned,
+            'mask_operations': self.mask_operations,
+            'pruned_nodes': self.pruned_nodes,
+            'phase_seconds': {phase: round(seconds, 6) for phase, seconds in self.phase_seconds.items()},
+        }
+
+
+    def __repr__(self) -> str:
+        """
+        Returns a one-line summary of the statistics.
+        """
+
+        return f'SearchStats({self.as_dict()})'
@@ -8,8 +8,12 @@ Author : Szeto Lok
 """
 
 from binh_chess import *
+from search_stats import *
+import heapq
+import multiprocessing
 import pandas as pd
 import re
+import time
 
 # This function should be taken from task 6
 def read_pgn(file_name: str) -> list[dict]:
@@ -156,7 +160,7 @@ def read_pgn(file_name: str) -> list[dict]:
     return games
 
 #Part 1
-def count_positions(moves: list[str], depth: int) -> int:
+def count_positions(moves: list[str], depth: int, stats: SearchStats = None) -> int:
     """
     Recursively counts the number of legal move sequences of a given depth
     starting from the specified chess board state.
@@ -165,11 +169,17 @@ def count_positions(moves: list[str], depth: int) -> int:
         moves (list[str]): A list of moves in Standard Algebraic Notation (SAN)
             representing the current board state (empty list means starting position).
         depth (int): The number of additional moves (plies) to consider.
+        stats (SearchStats): Optional statistics to record visited nodes and
+            move generation time into (no bookkeeping when None).
 
     Returns:
         int: The total number of valid move sequences of the specified depth.
     """
 
+    # Record this node when instrumentation is enabled.
+    if stats is not None:
+        stats.visit(depth)
+
     # Base case: If depth is zero, there are no more moves to make.
     # There is exactly one sequence (the current position itself).
     if depth == 0:
@@ -180,7 +190,12 @@ def count_positions(moves: list[str], depth: int) -> int:
 
     # Use binh_chess.possible_moves to get all legal next moves from the current position.
     # This returns a list of moves in SAN that are valid from the current board state.
-    next_moves = possible_moves(moves)
+    if stats is None:
+        next_moves = possible_moves(moves)
+    else:
+        start = time.perf_counter()
+        next_moves = possible_moves(moves)
+        stats.add_time('move generation', time.perf_counter() - start)
 
     # For each legal next move, recursively count the number of valid sequences
     # that can be made from the new board state (after making this move),
@@ -191,13 +206,14 @@ def count_positions(moves: list[str], depth: int) -> int:
 
         # Recursively count all valid sequences from this new position with reduced depth.
         # Add the result to the running total.
-        total_sequences += count_positions(new_move_history, depth - 1)
+        total_sequences += count_positions(new_move_history, depth - 1, stats)
 
     # After considering all possible moves at this depth, return the total count.
     return total_sequences
 
 #Part 2
-def winning_statistics(file_name: str, depth: int, tolerance: int) -> tuple[float, list[str], int]:
+def winning_statistics(file_name: str, depth: int, tolerance: int, stats: SearchStats = None,
+                       top_k: int = None, workers: int = None) -> tuple[float, list[str], int]:
     """
     Analyzes a PGN file to find the move sequence of specified depth with the highest white win probability,
     given a minimum number of games (tolerance) that follow the sequence.
@@ -206,160 +222,546 @@ def winning_statistics(file_name: str, depth: int, tolerance: int) -> tuple[floa
         file_name (str): Path to the PGN file containing chess games.
         depth (int): Number of moves (plies) in the sequence to analyze.
         tolerance (int): Minimum number of games required to consider a sequence valid.
+        stats (SearchStats): Optional statistics to record nodes, rows scanned, mask
+            operations and the time of the parse / frame build / search phases into.
+            With workers, only the phase times are recorded.
+        top_k (int): If given, return the best top_k sequences instead of only the best one.
+            They are collected in the same single search with a bounded min-heap.
+        workers (int): If greater than 1, search the subtree of each first move in a
+            separate process (see parallel_best_sequences). The result is identical.
 
     Returns:
         tuple[float, list[str], int]: A tuple containing:
             - Highest white win probability (0.0 if no valid sequence)
             - Move sequence achieving this probability (empty list if none)
             - Total games matching the sequence (0 if none)
+        With top_k, a list of up to top_k such tuples, best first. Equal probabilities keep
+        the search order, so the first tuple is the single best result; sequences that
+        white never won are left out, as they are never reported as the best result.
     """
 
-    # Read and parse the PGN file into a list of game dictionaries
-    games = read_pgn(file_name)
-    df = pd.DataFrame(games)
+    # Read and parse the PGN file into a DataFrame with one row per game
+    df = read_games_frame(file_name, stats)
+
+    # Find the best sequences, splitting the search over processes if requested
+    if workers is not None and workers > 1 and depth > 0:
+        results = parallel_best_sequences(df, depth, tolerance, top_k, workers, stats)
+    else:
+        results = best_sequences(df, depth, tolerance, top_k, stats)
+
+    # Return the collected sequences best first when top_k was requested
+    if top_k is not None:
+        return [(round(probability, 4), sequence, total) for probability, _, sequence, total in results]
+
+    # Return formatted results if valid sequence found, otherwise return defaults
+    if results:
+        best_probability, _, best_sequence, best_total = results[0]
+        return (round(best_probability, 4), best_sequence, best_total)
+    else:
+        return (0.0, [], 0)
+
 
-    def recursive_search(current_moves: list[str], current_depth: int) -> tuple[float, list[str], int]:
+def best_sequences(df: pd.DataFrame, depth: int, tolerance: int, top_k: int = None,
+                   stats: SearchStats = None) -> list[tuple[float, tuple[int, ...], list[str], int]]:
+    """
+    Searches a DataFrame of games for the sequences with the highest white win probability.
+
+    Args:
+        df (pd.DataFrame): The games, as returned by read_games_frame.
+        depth (int): Number of moves (plies) in each sequence.
+        tolerance (int): Minimum number of games a sequence needs.
+        top_k (int): Number of sequences to keep (None keeps only the best one).
+        stats (SearchStats): Optional statistics to record into.
+
+    Returns:
+        list[tuple[float, tuple[int, ...], list[str], int]]: (probability, rank, sequence, total)
+            of the best sequences, best first; empty if no sequence has a positive probability.
+    """
+
+    # The best sequence found so far as (probability, rank, sequence, total).
+    # A sequence only replaces it with a higher probability, or an equal one and an
+    # earlier rank, so ties go to the sequence the original search found first.
+    best = (0.0, (), [], 0)
+
+    # For top_k: a min-heap of (probability, negated rank, rank, sequence, total) holding the
+    # best sequences seen so far, so its root is always the entry to replace next.
+    best_heap = []
+
+    def visit(probability: float, sequence: list[str], total: int, rank: tuple[int, ...]) -> None:
         """
-        Recursively searches for the move sequence with the highest white win probability,
-        given a minimum number of games (tolerance), starting from the current_moves sequence.
+        Compares one sequence that reached the tolerance with the best results so far.
 
         Args:
-            current_moves (list[str]): The current sequence of moves being considered.
-            current_depth (int): The number of moves left to reach the target depth.
+            probability (float): White win probability of the sequence.
+            sequence (list[str]): The move sequence.
+            total (int): Number of games that follow the sequence.
+            rank (tuple[int, ...]): Position of the sequence in the original search order.
+        """
+
+        nonlocal best
+
+        # Update the best result if this sequence is better
+        if is_better(probability, rank, best[0], best[1]):
+            best = (probability, rank, sequence, total)
+
+        # Offer this sequence to the top_k heap. All ranks have the same length, so a
+        # larger negated rank means an earlier sequence, which wins ties.
+        if top_k is not None and probability > 0:
+            entry = (probability, tuple(-position for position in rank), rank, sequence, total)
+
+            if len(best_heap) < top_k:
+                heapq.heappush(best_heap, entry)
+            else:
+                heapq.heappushpop(best_heap, entry)
+
+    def can_improve(white_wins: int, total: int, rank: tuple[int, ...]) -> bool:
+        """
+        Decides whether any sequence below a prefix could still change the result.
+
+        Args:
+            white_wins (int): White wins among the games that follow the prefix.
+            total (int): Number of games that follow the prefix.
+            rank (tuple[int, ...]): Position of the prefix in the original search order.
 
         Returns:
-            tuple[float, list[str], int]: The best probability, the sequence, and the number of games.
+            bool: False if the whole subtree can be skipped.
         """
 
-        # Determine how many moves we need to check in the sequence
-        number_of_moves_to_check = len(current_moves)
+        bound = probability_bound(white_wins, tolerance)
 
-        # Generate the corresponding column names for the moves list
-        # Example: ['w1', 'b1', 'w2'] for moves ['e4', 'e5', 'Nf3']
-        move_columns = []
+        # Without top_k, a subtree must be able to beat the current best sequence
+        if top_k is None:
+            return is_better(bound, rank, best[0], best[1])
 
-        for move_index in range(number_of_moves_to_check):
+        # With top_k, it must be able to beat the weakest sequence kept in a full heap
+        if len(best_heap) < top_k:
+            return bound > 0
 
-            # Calculate which round (1-based) this move belongs to
-            # First two moves (indices 0-1) are round 1, next two (2-3) are round 2, etc.
-            round_number = (move_index // 2) + 1
-            
-            # Even indices (0, 2, 4...) are white moves (w1, w2, w3...)
-            if move_index % 2 == 0:
-                move_columns.append(f'w{round_number}')
+        return is_better(bound, rank, best_heap[0][0], best_heap[0][2])
 
-            # Odd indices (1, 3, 5...) are black moves (b1, b2, b3...)
-            else:
-                move_columns.append(f'b{round_number}')
+    # Visit every sequence of the requested depth played in at least tolerance games
+    search_sequences(df, depth, tolerance, visit, stats, can_improve)
+
+    if top_k is not None:
+        ranked = sorted(best_heap, reverse=True)
+        return [(probability, rank, sequence, total) for probability, _, rank, sequence, total in ranked]
+
+    return [best] if best[3] > 0 else []
+
+
+# The games DataFrame of a parallel search worker, set once per process by init_worker
+worker_games = None
+
+
+def init_worker(df: pd.DataFrame) -> None:
+    """
+    Stores the games in a worker process so each task only needs to send a first move.
+    With the fork context of parallel_best_sequences the DataFrame is inherited, not pickled.
+
+    Args:
+        df (pd.DataFrame): The games, as returned by read_games_frame.
+    """
+
+    global worker_games
+    worker_games = df
+
+
+def search_branch(first_move: str, root_position: int, depth: int, tolerance: int,
+                  top_k: int = None) -> list[tuple[float, tuple[int, ...], list[str], int]]:
+    """
+    Searches the subtree of one first move inside a worker process.
+
+    Args:
+        first_move (str): The first move shared by every sequence of the subtree.
+        root_position (int): Rank of the first move in the full search.
+        depth (int): Number of moves (plies) in each sequence.
+        tolerance (int): Minimum number of games a sequence needs.
+        top_k (int): Number of sequences to keep (None keeps only the best one).
+
+    Returns:
+        list[tuple[float, tuple[int, ...], list[str], int]]: The best sequences of the
+            subtree, with ranks rewritten to their positions in the full search.
+    """
+
+    # The games of this branch, in their original order, so deeper ranks are unchanged
+    branch_games = worker_games[worker_games['w1'] == first_move]
+
+    results = best_sequences(branch_games, depth, tolerance, top_k)
+
+    # Within the branch the first move is always at position 0
+    return [(probability, (root_position,) + rank[1:], sequence, total) for probability, rank, sequence, total in results]
+
+
+def parallel_best_sequences(df: pd.DataFrame, depth: int, tolerance: int, top_k: int = None, workers: int = 2,
+                            stats: SearchStats = None) -> list[tuple[float, tuple[int, ...], list[str], int]]:
+    """
+    Runs best_sequences with the subtree of each first move searched in a process pool.
+
+    Every worker receives the games once, when it starts, and each task only names a
+    first move. The pool uses the 'fork' start method where the platform has it (Linux
+    and macOS), so the workers read the parent's DataFrame through copy-on-write pages
+    instead of unpickling their own copy (reference counting still copies the pages of
+    the strings a worker touches, one page at a time). Without fork (Windows) the
+    default start method is used and every worker receives a pickled copy. The per-branch results
+    carry their ranks in the full search, so merging them with the same tie-breaking
+    gives exactly the serial result.
+
+    Args:
+        df (pd.DataFrame): The games, as returned by read_games_frame.
+        depth (int): Number of moves (plies) in each sequence (at least 1).
+        tolerance (int): Minimum number of games a sequence needs.
+        top_k (int): Number of sequences to keep (None keeps only the best one).
+        workers (int): Number of worker processes.
+        stats (SearchStats): Optional statistics; only the search time is recorded.
+
+    Returns:
+        list[tuple[float, tuple[int, ...], list[str], int]]: As for best_sequences.
+    """
+
+    if stats is not None:
+        start = time.perf_counter()
+
+    # First moves in order of first appearance give the rank of each branch
+    first_moves = df['w1'].drop_duplicates().tolist()
+    move_counts = df['w1'].value_counts()
+
+    # Only branches with enough games can hold a valid sequence; biggest branches go first
+    branches = [(move, position) for position, move in enumerate(first_moves)
+                if move != '-' and move_counts[move] >= tolerance]
+    branches.sort(key=lambda branch: -move_counts[branch[0]])
+
+    # Under fork, initargs are inherited by the children rather than pickled.
+    context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+
+    with context.Pool(workers, initializer=init_worker, initargs=(df,)) as pool:
+        branch_results = pool.starmap(search_branch, [(move, position, depth, tolerance, top_k) for move, position in branches])
+
+    # Merge: higher probability first, earlier rank first on ties
+    merged = [result for results in branch_results for result in results]
+    merged.sort(key=lambda result: (-result[0], result[1]))
+
+    if stats is not None:
+        stats.add_time('search', time.perf_counter() - start)
+
+    return merged[:top_k] if top_k is not None else merged[:1]
+
+
+
+def winning_statistics_sweep(file_name: str, depth: int, tolerances: list[int],
+                             stats: SearchStats = None) -> dict[int, tuple[float, list[str], int]]:
+    """
+    Answers winning_statistics for several tolerances with a single search.
+
+    The search visits every sequence played in at least min(tolerances) games, and each
+    sequence updates the best result of every tolerance it satisfies.
+
+    Args:
+        file_name (str): Path to the PGN file containing chess games.
+        depth (int): Number of moves (plies) in the sequence to analyze.
+        tolerances (list[int]): The minimum game counts to answer for.
+        stats (SearchStats): Optional statistics, as for winning_statistics.
+
+    Returns:
+        dict[int, tuple[float, list[str], int]]: For each tolerance, the same tuple that
+            winning_statistics(file_name, depth, tolerance) returns.
+    """
+
+    # Sorted tolerances let each sequence stop at the first tolerance it fails
+    sorted_tolerances = sorted(set(tolerances))
+
+    # No tolerances requested: nothing to search for
+    if not sorted_tolerances:
+        return {}
+
+    df = read_games_frame(file_name, stats)
+
+    # Best (probability, rank, sequence, total) per tolerance
+    best_results = {tolerance: (0.0, (), [], 0) for tolerance in sorted_tolerances}
+
+    def visit(probability: float, sequence: list[str], total: int, rank: tuple[int, ...]) -> None:
+        """
+        Updates the best result of every tolerance this sequence satisfies.
+
+        Args:
+            probability (float): White win probability of the sequence.
+            sequence (list[str]): The move sequence.
+            total (int): Number of games that follow the sequence.
+            rank (tuple[int, ...]): Position of the sequence in the original search order.
+        """
+
+        for tolerance in sorted_tolerances:
+
+            # Higher tolerances need even more games, so none of them can be satisfied
+            if total < tolerance:
+                break
+
+            best_probability, best_rank = best_results[tolerance][:2]
+            if is_better(probability, rank, best_probability, best_rank):
+                best_results[tolerance] = (probability, rank, sequence, total)
+
+    def can_improve(white_wins: int, total: int, rank: tuple[int, ...]) -> bool:
+        """
+        Decides whether any sequence below a prefix could still improve some tolerance.
+
+        Args:
+            white_wins (int): White wins among the games that follow the prefix.
+            total (int): Number of games that follow the prefix.
+            rank (tuple[int, ...]): Position of the prefix in the original search order.
+
+        Returns:
+            bool: False if the whole subtree can be skipped.
+        """
+
+        for tolerance in sorted_tolerances:
+            if total < tolerance:
+                break
+
+            best_probability, best_rank = best_results[tolerance][:2]
+            if is_better(probability_bound(white_wins, tolerance), rank, best_probability, best_rank):
+                return True
+
+        return False
+
+    # One search with the smallest tolerance covers every sequence any tolerance needs
+    search_sequences(df, depth, sorted_tolerances[0], visit, stats, can_improve)
+
+    # Format each result the way winning_statistics does
+    results = {}
+    for tolerance in tolerances:
+        probability, _, sequence, total = best_results[tolerance]
+        results[tolerance] = (round(probability, 4), sequence, total) if total > 0 else (0.0, [], 0)
+
+    return results
+
+
+def read_games_frame(file_name: str, stats: SearchStats = None) -> pd.DataFrame:
+    """
+    Reads a PGN file into a DataFrame with one row per game (the columns of read_pgn).
+
+    Args:
+        file_name (str): Path to the PGN file containing chess games.
+        stats (SearchStats): Optional statistics to record the parse and frame build time into.
+
+    Returns:
+        pd.DataFrame: The parsed games.
+    """
+
+    if stats is not None:
+        start = time.perf_counter()
+
+    games = read_pgn(file_name)
+
+    if stats is not None:
+        stats.add_time('parse', time.perf_counter() - start)
+        start = time.perf_counter()
+
+    df = pd.DataFrame(games)
+
+    if stats is not None:
+        stats.add_time('frame build', time.perf_counter() - start)
+
+    return df
+
+
+def move_column(move_index: int) -> str:
+    """
+    Returns the read_pgn column name of a move in a sequence.
+
+    Args:
+        move_index (int): Position of the move in the sequence (0 = white's first move).
+
+    Returns:
+        str: The column name, e.g. 'w1' for index 0, 'b1' for 1 and 'w2' for 2.
+    """
+
+    # Calculate which round (1-based) this move belongs to
+    # First two moves (indices 0-1) are round 1, next two (2-3) are round 2, etc.
+    round_number = (move_index // 2) + 1
+
+    # Even indices (0, 2, 4...) are white moves (w1, w2, w3...)
+    # Odd indices (1, 3, 5...) are black moves (b1, b2, b3...)
+    if move_index % 2 == 0:
+        return f'w{round_number}'
+    else:
+        return f'b{round_number}'
 
-        # Initialize a boolean mask with all values True
-        # This means all games are initially considered matches
-        mask = pd.Series([True] * len(df))
 
-        # Pair each move in the input list with its corresponding column name
-        # Example: zip(['w1', 'b1', 'w2'], ['e4', 'e5', 'Nf3'])
-        move_column_pairs = zip(move_columns, current_moves)
+def probability_bound(white_wins: int, min_games: int) -> float:
+    """
+    Returns an upper bound on the white win probability of any sequence extending a prefix.
+
+    A longer sequence is followed by a subset of the prefix's games, so it has at most
+    white_wins wins, and it needs at least min_games games to count.
+
+    Args:
+        white_wins (int): White wins among the games that follow the prefix.
+        min_games (int): Minimum number of games a sequence needs.
+
+    Returns:
+        float: min(1.0, white_wins / min_games).
+    """
+
+    if min_games <= 0:
+        return 1.0 if white_wins > 0 else 0.0
+
+    return min(1.0, white_wins / min_games)
+
+
+def is_better(probability: float, rank: tuple[int, ...], best_probability: float, best_rank: tuple[int, ...]) -> bool:
+    """
+    Compares a result (or the bound of a prefix) with the current best result.
+
+    Higher probabilities win; equal probabilities go to the earlier rank, which is the
+    sequence the original left-to-right search would have kept. rank may be a prefix,
+    in which case it is compared with the same-length prefix of best_rank. A best_rank
+    of () means nothing has been found yet, and then only a positive probability counts.
+
+    Args:
+        probability (float): Probability (or probability bound) of the candidate.
+        rank (tuple[int, ...]): Search order position of the candidate (or its prefix).
+        best_probability (float): Probability of the current best result.
+        best_rank (tuple[int, ...]): Search order position of the current best result.
+
+    Returns:
+        bool: True if the candidate is (or may lead to) a better result.
+    """
+
+    if probability != best_probability:
+        return probability > best_probability
+
+    return tuple(rank) < best_rank[:len(rank)]
+
+
+def search_sequences(df: pd.DataFrame, depth: int, min_games: int, visit, stats: SearchStats = None,
+                     can_improve=None) -> None:
+    """
+    Recursively visits every move sequence of the given depth that at least min_games
+    games follow, using branch-and-bound to skip subtrees that cannot matter.
 
-        # Refine the mask by checking each move in sequence
-        for column_name, expected_move in move_column_pairs:
+    Each sequence is passed to visit with its rank: the tuple of the positions of its
+    moves in order of first appearance in the games, which is the order the original
+    winning_statistics search explored them. Children are searched in a different order
+    (highest probability bound and win rate first) so strong results are found early;
+    visitors compare ranks to break ties, so results do not depend on that order.
 
-            # For each move-column pair:
-            # 1. Check if the game's move in this column matches the expected move
-            # 2. Combine with previous checks using logical AND (&)
-            # This progressively filters out non-matching games
-            mask = mask & (df[column_name] == expected_move)
+    Args:
+        df (pd.DataFrame): The games, as returned by read_games_frame.
+        depth (int): Number of moves (plies) in each sequence.
+        min_games (int): Minimum number of games a sequence needs to be visited.
+            Prefixes with fewer games are skipped, since longer sequences only lose games.
+        visit (function): Called as visit(probability, sequence, total, rank) for each sequence.
+        stats (SearchStats): Optional statistics to record nodes, rows and search time into.
+        can_improve (function): Optional; called as can_improve(white_wins, total, rank) for
+            each prefix before it is searched. Returning False skips the prefix.
+    """
+
+    # Whether white won each game, so wins can be summed per next move
+    df = df.assign(white_win=df['result'].eq('1-0'))
+
+    # The moves and ranks of the sequence currently being explored
+    current_moves = []
+    current_rank = []
+
+    def recursive_search(filtered_games: pd.DataFrame, white_wins: int, total_games: int, current_depth: int) -> None:
+        """
+        Visits the sequences below current_moves.
 
-        # Apply the final mask to get only games matching ALL moves
-        filtered_games = df[mask]
+        Args:
+            filtered_games (pd.DataFrame): The games that follow current_moves (None at a leaf).
+            white_wins (int): Number of those games white won.
+            total_games (int): Number of those games.
+            current_depth (int): The number of moves left to reach the target depth.
+        """
+
+        # Record this node when instrumentation is enabled.
+        if stats is not None:
+            stats.visit(current_depth)
 
         # =========================
         # BASE CASE: Target depth reached
         # =========================
         if current_depth == 0:
-            # Count the number of games that match the current move sequence
-            total_games = len(filtered_games)
 
             # Check if the number of games meets the minimum tolerance requirement
-            if total_games >= tolerance:
-                # Count how many of these games were won by white
-                white_wins = filtered_games['result'].eq('1-0').sum()
+            if total_games >= min_games:
 
                 # Calculate the probability of white winning in these games
                 probability = white_wins / total_games if total_games > 0 else 0.0
 
-                # Return the probability, the move sequence, and the total number of games
-                return (probability, current_moves.copy(), total_games)
-            else:
-                # If not enough games, return zero probability and an empty sequence
-                return (0.0, [], 0)
+                visit(probability, current_moves.copy(), total_games, tuple(current_rank))
 
+            return
 
         # =========================
         # RECURSION CASE: Explore next moves
         # =========================
 
-        # Determine the next move index (how many moves have been played so far)
-        next_move_index = len(current_moves)
-
-        # Calculate which round (1-based) next move belongs to
-        round_number = (next_move_index // 2) + 1
-        
-        # Even indices (0, 2, 4...) are white moves (w1, w2, w3...)
-        if next_move_index % 2 == 0:
-            next_column = (f'w{round_number}')
+        # read_pgn keeps 20 rounds, so there are no moves past the last column
+        next_column = move_column(len(current_moves))
+        if next_column not in filtered_games:
+            return
 
-        # Odd indices (1, 3, 5...) are black moves (b1, b2, b3...)
-        else:
-            next_column = (f'b{round_number}')
+        # Group the games by their next move: one pass gives every child's game count
+        # and white wins, in order of first appearance.
+        grouped_games = filtered_games.groupby(next_column, sort=False)
+        children = grouped_games['white_win'].agg(['sum', 'size'])
 
-        # Initialize an empty list to store the valid possible next moves
-        possible_moves = []
+        if stats is not None:
+            stats.mask_operations += 1
+            stats.rows_scanned += total_games
 
-        # Iterate over all unique moves found in the next move column of the filtered DataFrame
-        for move in filtered_games[next_column].unique():
+        # Collect the children worth searching with their ordering key
+        candidates = []
+        for position, (move, child_wins, child_total) in enumerate(zip(children.index, children['sum'], children['size'])):
 
-            # Check if the move is not a placeholder '-'
             # The '-' value indicates that there is no move in this position for some games
-            if move != '-':
-
-                # If the move is valid (not '-'), add it to the list of possible moves
-                possible_moves.append(move)
-
-        # Initialize variables to keep track of the best result found so far
-        best_probability = 0.0
-        best_sequence = []
-        best_total = 0
+            if move == '-':
+                continue
+
+            # Longer sequences only lose games, so too few games here means none below
+            if child_total < min_games:
+                if stats is not None:
+                    stats.pruned_nodes += 1
+                continue
+
+            bound = probability_bound(child_wins, min_games)
+            candidates.append((-bound, -child_wins / child_total, position, move, int(child_wins), int(child_total)))
+
+        # Search the children with the highest bound (then win rate) first
+        candidates.sort()
+
+        for _, _, position, move, child_wins, child_total in candidates:
+            current_rank.append(position)
+
+            # Skip the child if nothing below it can change the result
+            if can_improve is not None and not can_improve(child_wins, child_total, current_rank):
+                current_rank.pop()
+                if stats is not None:
+                    stats.pruned_nodes += 1
+                continue
+
+            # Only children that have their own children need their games selected
+            if current_depth > 1:
+                child_games = filtered_games.iloc[grouped_games.indices[move]]
+            else:
+                child_games = None
 
-        # Try each possible next move recursively
-        for move in possible_moves:
-            # Add the move to the current sequence
+            # Add the move to the current sequence and search below it
             current_moves.append(move)
-
-            # Recursively search for the best sequence from this new position, reducing depth by 1
-            probability, sequence, total = recursive_search(current_moves, current_depth - 1)
+            recursive_search(child_games, child_wins, child_total, current_depth - 1)
 
             # Remove the move after recursion to backtrack
             current_moves.pop()
+            current_rank.pop()
 
-            # Check if the total occurrence reach the tolerance number
-            if total >= tolerance:
-
-                # Update the best result if this sequence is better
-                if probability > best_probability:
-                    best_probability, best_sequence, best_total = probability, sequence, total
-
-        # Return the best probability, sequence, and number of games found
-        return (best_probability, best_sequence, best_total)
+    # Initiate recursive search from empty starting sequence
+    if stats is not None:
+        start = time.perf_counter()
 
+    recursive_search(df, int(df['white_win'].sum()), len(df), depth)
 
-    # Initiate recursive search from empty starting sequence
-    result = recursive_search([], depth)
-    
-    # Return formatted results if valid sequence found, otherwise return defaults
-    if result[2] >= tolerance:
-        return (round(result[0], 4), result[1], result[2])
-    else:
-        return (0.0, [], 0)
+    if stats is not None:
+        stats.add_time('search', time.perf_counter() - start)
 
 
 # WARNING!!! *DO NOT* REMOVE THIS LINE
@@ -0,0 +1,251 @@
+import os
+import unittest
+import json
+from task7 import *
+from benchmark_perft import *
+from deep_search import *
+from beam_search import *
+
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Q6')
+LICHESS_SMALL = os.path.join(DATA_DIRECTORY, 'lichess_small.pgn')
+
+
+class TestCountPositions(unittest.TestCase):
+
+    def test_reference_counts(self):
+        """
+        Test that count_positions matches the known perft counts of the quick suite.
+        """
+
+        for name, moves, depth, expected in PERFT_CASES:
+            if name in SUITES['quick']:
+                self.assertEqual(count_positions(list(moves), depth), expected, f"Wrong count for {name}")
+
+
+class TestWinningStatistics(unittest.TestCase):
+
+    def test_reference_results(self):
+        """
+        Test the winning_statistics examples from part2.txt.
+        """
+
+        self.assertEqual(winning_statistics(LICHESS_SMALL, 3, 5), (1.0, ['d4', 'd6', 'c4'], 5))
+        self.assertEqual(winning_statistics(LICHESS_SMALL, 3, 6), (0.8571, ['d4', 'd5', 'c4'], 21))
+        self.assertEqual(winning_statistics(LICHESS_SMALL, 3, 22), (0.6585, ['e4', 'e5', 'Nf3'], 41))
+        self.assertEqual(winning_statistics(LICHESS_SMALL, 3, 42), (0, [], 0))
+
+
+    def test_top_k_ranks_runners_up(self):
+        """
+        Test that top_k returns the best sequences in order, starting with the single best result.
+        """
+
+        top_lines = winning_statistics(LICHESS_SMALL, 3, 5, top_k=5)
+
+        self.assertEqual(len(top_lines), 5)
+        self.assertEqual(top_lines[0], winning_statistics(LICHESS_SMALL, 3, 5))
+        self.assertEqual(top_lines[1], (0.8571, ['d4', 'd5', 'c4'], 21))
+        self.assertEqual([line[0] for line in top_lines], sorted((line[0] for line in top_lines), reverse=True))
+        self.assertTrue(all(line[2] >= 5 for line in top_lines))
+
+
+    def test_top_k_without_valid_sequences(self):
+        """
+        Test that top_k returns an empty list when no sequence reaches the tolerance.
+        """
+
+        self.assertEqual(winning_statistics(LICHESS_SMALL, 3, 42, top_k=3), [])
+        self.assertEqual(winning_statistics(LICHESS_SMALL, 3, 22, top_k=1), [winning_statistics(LICHESS_SMALL, 3, 22)])
+
+
+    def test_sweep_matches_independent_runs(self):
+        """
+        Test that one tolerance sweep gives the same answer as a separate run per tolerance.
+        """
+
+        tolerances = [5, 6, 22, 42]
+        sweep = winning_statistics_sweep(LICHESS_SMALL, 3, tolerances)
+
+        self.assertEqual(list(sweep), tolerances)
+        for tolerance in tolerances:
+            self.assertEqual(sweep[tolerance], winning_statistics(LICHESS_SMALL, 3, tolerance), f"Mismatch at tolerance {tolerance}")
+
+
+    def test_pruned_search_matches_exhaustive_search(self):
+        """
+        Test that branch-and-bound gives the same result as visiting every sequence.
+        """
+
+        df = read_games_frame(LICHESS_SMALL)
+
+        for depth, tolerance in [(2, 3), (3, 5), (4, 2), (5, 4)]:
+            sequences = []
+            search_sequences(df, depth, tolerance, lambda *sequence: sequences.append(sequence))
+
+            # The exhaustive answer: highest probability, earliest rank on ties
+            probability, sequence, total, _ = min(sequences, key=lambda entry: (-entry[0], entry[3]))
+            expected = (round(probability, 4), sequence, total) if probability > 0 else (0.0, [], 0)
+
+            stats = SearchStats()
+            self.assertEqual(winning_statistics(LICHESS_SMALL, depth, tolerance, stats), expected)
+            self.assertGreater(stats.pruned_nodes, 0, "Expected some subtrees to be pruned")
+
+
+    def test_parallel_search_matches_serial_search(self):
+        """
+        Test that splitting the search over worker processes gives identical results, including ties.
+        """
+
+        for depth, tolerance in [(3, 5), (3, 6), (4, 1), (3, 42)]:
+            self.assertEqual(winning_statistics(LICHESS_SMALL, depth, tolerance, workers=2),
+                             winning_statistics(LICHESS_SMALL, depth, tolerance))
+
+        self.assertEqual(winning_statistics(LICHESS_SMALL, 3, 2, top_k=10, workers=3),
+                         winning_statistics(LICHESS_SMALL, 3, 2, top_k=10))
+
+
+class TestDeepSearch(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Parse the small Lichess sample once.
+        """
+
+        self.df = read_games_frame(LICHESS_SMALL)
+
+
+    def test_matches_recursive_search(self):
+        """
+        Test that the iterative engine gives the same results as winning_statistics.
+        """
+
+        for depth, tolerance in [(0, 5), (3, 5), (3, 6), (3, 22), (3, 42), (6, 2)]:
+            self.assertEqual(DeepSearch(self.df, depth, tolerance).run(), winning_statistics(LICHESS_SMALL, depth, tolerance))
+
+        # read_pgn keeps 40 plies, so longer sequences never occur
+        self.assertEqual(DeepSearch(self.df, 41, 1).run(), (0.0, [], 0))
+
+        self.assertEqual(winning_statistics_iterative(LICHESS_SMALL, 3, 6), (0.8571, ['d4', 'd5', 'c4'], 21))
+
+
+    def test_time_budget_and_checkpoint_resume(self):
+        """
+        Test that a search stopped by its time budget resumes from a JSON checkpoint to the same answer.
+        """
+
+        expected = DeepSearch(self.df, 8, 2).run()
+
+        search = DeepSearch(self.df, 8, 2)
+        search.run(time_budget=0)
+        self.assertFalse(search.finished, "Expected a zero budget to stop the search")
+
+        resumed = 0
+        while not search.finished:
+            state = json.loads(json.dumps(search.checkpoint()))
+            search = DeepSearch.from_checkpoint(self.df, state)
+            search.run(time_budget=0.002)
+            resumed += 1
+
+        self.assertEqual(search.result(), expected)
+        self.assertGreater(resumed, 0)
+
+
+class TestBeamSearch(unittest.TestCase):
+
+    def test_wide_beam_is_exact(self):
+        """
+        Test that a beam wider than the tree gives the exhaustive answer with a zero gap bound.
+        """
+
+        result, gap_bound = winning_statistics_beam(LICHESS_SMALL, 3, 6, beam_width=10000)
+
+        self.assertEqual(result, winning_statistics(LICHESS_SMALL, 3, 6))
+        self.assertEqual(gap_bound, 0.0)
+
+
+    def test_gap_bound_covers_real_gap(self):
+        """
+        Test that a narrow beam never misses the exhaustive probability by more than its reported bound.
+        """
+
+        for beam_width in (1, 3, 10):
+            for entry in compare_beam(LICHESS_SMALL, [2, 4, 6], 3, beam_width):
+                self.assertGreaterEqual(entry['gap'], 0)
+                self.assertLessEqual(entry['gap'], entry['gap_bound'] + 1e-4, f"Gap exceeds its bound: {entry}")
+
+
+class TestSearchStats(unittest.TestCase):
+
+    def test_count_positions_records_nodes_per_depth(self):
+        """
+        Test that instrumented count_positions records every node and the move generation time.
+        """
+
+        stats = SearchStats()
+
+        self.assertEqual(count_positions([], 2, stats), 400)
+        self.assertEqual(stats.nodes_per_depth, {2: 1, 1: 20, 0: 400})
+        self.assertIn('move generation', stats.phase_seconds)
+
+
+    def test_winning_statistics_records_phases(self):
+        """
+        Test that instrumented winning_statistics returns the same result and fills every phase.
+        """
+
+        stats = SearchStats()
+
+        self.assertEqual(winning_statistics(LICHESS_SMALL, 2, 5, stats), winning_statistics(LICHESS_SMALL, 2, 5))
+        self.assertEqual(stats.nodes_per_depth[2], 1)
+        self.assertGreater(stats.mask_operations, 0)
+        self.assertGreater(stats.rows_scanned, stats.mask_operations)
+        self.assertEqual(set(stats.phase_seconds), {'parse', 'frame build', 'search'})
+
+
+class TestBenchmarkPerft(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Build a small baseline report by hand.
+        """
+
+        self.baseline = {'cases': [
+            {'name': 'start-2', 'nodes': 400, 'expected': 400, 'correct': True, 'seconds': 1.0},
+            {'name': 'start-3', 'nodes': 8902, 'expected': 8902, 'correct': True, 'seconds': 2.0},
+        ]}
+
+
+    def test_run_suite_reports_measurements(self):
+        """
+        Test that a benchmark run reports correct counts with timing and memory fields.
+        """
+
+        report = run_suite('quick')
+
+        self.assertEqual([case['name'] for case in report['cases']], SUITES['quick'])
+        for case in report['cases']:
+            self.assertTrue(case['correct'], f"Expected a correct count for {case['name']}")
+            self.assertGreater(case['peak_memory_bytes'], 0)
+            self.assertIn('nodes_per_second', case)
+
+
+    def test_compare_flags_slowdown_and_wrong_counts(self):
+        """
+        Test that compare_runs reports slowdowns above the threshold and wrong counts only.
+        """
+
+        current = {'cases': [
+            {'name': 'start-2', 'nodes': 400, 'expected': 400, 'correct': True, 'seconds': 1.05},
+            {'name': 'start-3', 'nodes': 8900, 'expected': 8902, 'correct': False, 'seconds': 2.0},
+        ]}
+
+        regressions = compare_runs(self.baseline, current)
+        self.assertEqual(len(regressions), 1, f"Expected only the wrong count, got {regressions}")
+
+        current['cases'][0]['seconds'] = 1.5
+        self.assertEqual(len(compare_runs(self.baseline, current)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()